@@ -0,0 +1,193 @@
+from asyncio import gather, run
+from importlib.util import find_spec
+from json import dumps, loads
+from pathlib import Path
+from sys import argv
+from time import perf_counter
+from timeit import repeat
+
+from httpx import AsyncClient, AsyncHTTPTransport, Limits
+from rich import print
+from rich.table import Table
+from yaml import safe_load
+
+from source.expansion import Converter
+
+
+def synthetic_page(images: int = 18, comments: int = 2000) -> str:
+    """生成结构与作品页面相近的测试页面，未提供页面文件时使用"""
+    note = {
+        "noteId": "0" * 24,
+        "title": "benchmark",
+        "desc": "benchmark " * 200,
+        "type": "normal",
+        "imageList": [
+            {
+                "urlDefault": f"http://sns-webpic-qc.xhscdn.com/202501010000/{i}/"
+                f"spectrum/{'a' * 32}!nd_dft_wlteh_webp_3",
+                "stream": {"h264": []},
+                "width": 1080,
+                "height": 1440,
+            }
+            for i in range(images)
+        ],
+        "tagList": [{"name": f"tag{i}", "type": "topic"} for i in range(10)],
+        "interactInfo": {"likedCount": "100", "collectedCount": "10"},
+        "user": {"nickname": "benchmark", "userId": "1" * 24},
+        "time": 1735660800000,
+    }
+    state = {
+        "global": {"appSettings": {"notificationInterval": 30}},
+        "user": {"loggedIn": False, "userInfo": {}},
+        "feed": {
+            "feeds": [
+                {"id": str(i), "note_card": {"display_title": "x" * 64}}
+                for i in range(comments)
+            ]
+        },
+        "note": {
+            "noteDetailMap": {note["noteId"]: {"note": note, "comments": {}}},
+            "serverRequestInfo": {"state": "success"},
+        },
+    }
+    text = dumps(state, ensure_ascii=False, separators=(",", ":")).replace(
+        '"loggedIn":false', '"loggedIn":undefined'
+    )
+    return (
+        "<html><head><script>window.__SSR__=true</script></head><body>"
+        f"<script>window.__INITIAL_STATE__={text}</script></body></html>"
+    )
+
+
+def load_pages(paths: list[str]) -> tuple[list[str], bool]:
+    """返回页面内容与是否使用生成的测试页面"""
+    pages = []
+    for i in paths:
+        if (path := Path(i)).is_dir():
+            pages.extend(
+                j.read_text(encoding="utf-8") for j in sorted(path.glob("*.html"))
+            )
+        elif path.is_file():
+            pages.append(path.read_text(encoding="utf-8"))
+    if pages:
+        return pages, False
+    return [synthetic_page()], True
+
+
+def benchmark_converter(pages: list[str], synthetic: bool, number: int = 20):
+    """使用相同的页面数据，对比 YAML 与 JSON 解析完整初始数据以及仅解析作品数据的耗时"""
+    converter = Converter()
+    states = [
+        converter._extract_object(i).removeprefix(converter.INITIAL_STATE_PREFIX)
+        for i in pages
+    ]
+
+    def convert_yaml():
+        return [converter._filter_object(safe_load(i)) for i in states]
+
+    def convert_json():
+        return [converter._filter_object(loads(converter.normalize(i))) for i in states]
+
+    def convert_subtree():
+        return [converter._filter_object(converter._decode_json(i)) for i in states]
+
+    decoders = {
+        "yaml.safe_load (full state)": convert_yaml,
+        "json (full state)": convert_json,
+        "json (noteDetailMap only)": convert_subtree,
+    }
+    expected = convert_yaml()
+    for name, function in decoders.items():
+        assert function() == expected, name
+    times = {
+        name: min(repeat(function, number=number, repeat=3)) / number
+        for name, function in decoders.items()
+    }
+    baseline = times["yaml.safe_load (full state)"]
+    table = Table(
+        title=f"Converter ({len(pages)} pages"
+        f"{', synthetic page, numbers are indicative only' if synthetic else ''})"
+    )
+    table.add_column("decoder")
+    table.add_column("ms / batch", justify="right")
+    table.add_column("speedup", justify="right")
+    for name, elapsed in times.items():
+        table.add_row(name, f"{elapsed * 1000:.2f}", f"{baseline / elapsed:.1f}x")
+    print(table)
+
+
+async def measure_client(
+    client: AsyncClient,
+    urls: list[str],
+    rounds: int,
+) -> tuple[int, int, float]:
+    """返回建立连接次数、下载字节数与耗时"""
+    handshakes = 0
+
+    async def trace(event: str, info: dict):
+        nonlocal handshakes
+        if event == "connection.connect_tcp.complete":
+            handshakes += 1
+
+    async def fetch(url: str) -> int:
+        size = 0
+        async with client.stream("GET", url, extensions={"trace": trace}) as response:
+            async for chunk in response.aiter_bytes():
+                size += len(chunk)
+        return size
+
+    start = perf_counter()
+    size = 0
+    async with client:
+        for __ in range(rounds):
+            size += sum(await gather(*(fetch(i) for i in urls)))
+    return handshakes, size, perf_counter() - start
+
+
+async def benchmark_connections(urls: list[str], rounds: int = 5):
+    """对比不同连接池配置下载相同文件时建立连接的次数与吞吐量"""
+    http2 = find_spec("h2") is not None
+    limits = Limits(
+        max_connections=len(urls),
+        max_keepalive_connections=len(urls),
+        keepalive_expiry=30,
+    )
+    clients = {
+        "no keep-alive": AsyncHTTPTransport(
+            verify=False,
+            limits=Limits(max_keepalive_connections=0),
+        ),
+        "default": AsyncHTTPTransport(verify=False),
+        f"tuned{' + http2' if http2 else ''}": AsyncHTTPTransport(
+            verify=False,
+            http2=http2,
+            limits=limits,
+        ),
+    }
+    table = Table(title=f"Connections ({len(urls)} urls x {rounds} rounds)")
+    table.add_column("client")
+    table.add_column("handshakes", justify="right")
+    table.add_column("MB / s", justify="right")
+    table.add_column("seconds", justify="right")
+    for name, transport in clients.items():
+        handshakes, size, elapsed = await measure_client(
+            AsyncClient(transport=transport, follow_redirects=True),
+            urls,
+            rounds,
+        )
+        table.add_row(
+            name,
+            str(handshakes),
+            f"{size / elapsed / 1024 / 1024:.2f}",
+            f"{elapsed:.2f}",
+        )
+    print(table)
+
+
+if __name__ == "__main__":
+    if argv[1:2] == ["connections"]:
+        # python benchmark.py connections URL [URL ...]
+        run(benchmark_connections(argv[2:]))
+    else:
+        # python benchmark.py [作品页面文件或文件夹 ...]
+        benchmark_converter(*load_pages(argv[1:]))
@@ -91,6 +91,21 @@ async def example_api():
     print(response.json())
 
 
+async def example_iter():
+    """逐个获取作品数据，适合处理大量作品链接"""
+
+    async def links():
+        # 逐行读取作品链接，无需一次性读取全部链接
+        with open("links.txt", encoding="utf-8") as f:
+            for line in f:
+                yield line
+
+    async with XHS() as xhs:
+        # 每个作品处理完成后立即返回数据，设置 ordered=True 按输入顺序返回
+        async for data in xhs.extract_iter(links(), download=True):
+            print(data)
+
+
 async def test():
     url = "" or paste()
     if not url:
@@ -115,4 +130,5 @@ async def test():
 if __name__ == "__main__":
     # run(example())
     # run(example_api())
+    # run(example_iter())
     run(test())
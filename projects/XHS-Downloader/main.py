@@ -42,6 +42,16 @@ async def mcp_server(
         )
 
 
+async def resume():
+    async with XHS(**Settings().run()) as xhs:
+        await xhs.resume()
+
+
+async def deduplicate(folder=""):
+    async with XHS(**Settings().run() | {"file_dedup": True}) as xhs:
+        await xhs.deduplicate(folder)
+
+
 if __name__ == "__main__":
     with suppress(
         KeyboardInterrupt,
@@ -55,5 +65,9 @@ if __name__ == "__main__":
         elif argv[1].upper() == "MCP":
             run(mcp_server())
             # run(mcp_server("stdio"))
+        elif argv[1].upper() == "RESUME":
+            run(resume())
+        elif argv[1].upper() == "DEDUP":
+            run(deduplicate(*argv[2:3]))
         else:
             cli()
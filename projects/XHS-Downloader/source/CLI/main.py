@@ -1,5 +1,7 @@
 from asyncio import run
-from contextlib import suppress
+from contextlib import contextmanager, suppress
+from cProfile import Profile
+from datetime import datetime
 from pathlib import Path as Root
 from textwrap import fill
 
@@ -44,6 +46,8 @@ class CLI:
         self.index = self.__format_index(ctx.params.pop("index"))
         self.path = ctx.params.pop("settings")
         self.update = ctx.params.pop("update_settings")
+        self.profile = ctx.params.pop("profile")
+        self.profiler = ctx.params.pop("profiler")
         self.settings = Settings(self.__check_settings_path())
         self.parameter = (
             self.settings.run()
@@ -61,9 +65,74 @@ class CLI:
 
     async def run(self):
         if self.url:
-            await self.APP.extract_cli(self.url, index=self.index)
+            with self.__run_profiler():
+                await self.APP.extract_cli(self.url, index=self.index)
+            if self.profile:
+                self.__print_profile(self.APP.statistics())
         self.__update_settings()
 
+    @contextmanager
+    def __run_profiler(self):
+        if not self.profiler:
+            yield
+            return
+        file = ROOT.joinpath(f"profile_{datetime.now():%Y%m%d%H%M%S}")
+        if self.profiler == "cprofile":
+            profiler = Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(file := file.with_suffix(".prof"))
+        else:
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                print(
+                    _("未安装 pyinstrument 模块，请运行 pip install pyinstrument 安装")
+                )
+                yield
+                return
+            profiler = Profiler(async_mode="enabled")
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                file = file.with_suffix(".html")
+                file.write_text(profiler.output_html(), encoding="utf-8")
+        print(_("性能分析结果已保存至：{0}").format(file))
+
+    @staticmethod
+    def __print_profile(statistics: dict) -> None:
+        stages = Table(title=_("处理阶段耗时"), highlight=True)
+        for column in ("stage", "count", "total (s)", "average (ms)", "max (ms)"):
+            stages.add_column(column, justify="left" if column == "stage" else "right")
+        for stage, item in sorted(
+            statistics.pop("stages").items(),
+            key=lambda x: x[1]["total"],
+            reverse=True,
+        ):
+            stages.add_row(
+                stage,
+                str(item["count"]),
+                f"{item['total']:.3f}",
+                f"{item['average'] * 1000:.1f}",
+                f"{item['max'] * 1000:.1f}",
+            )
+        counters = Table(title=_("运行统计"), highlight=True)
+        counters.add_column("name")
+        counters.add_column("value", justify="right")
+        for group, values in statistics.items():
+            for key, value in values.items():
+                counters.add_row(
+                    key if group == "counters" else f"{group}.{key}",
+                    str(value),
+                )
+        print(stages)
+        print(counters)
+
     def __update_settings(self):
         if self.update:
             self.settings.update(self.parameter)
@@ -153,6 +222,29 @@ class CLI:
                 ),
             ),
             ("--max_retry", "-mr", "int", _("请求数据失败时，重试的最大次数")),
+            ("--note_concurrency", "-nc", "int", _("同时处理的作品数量")),
+            ("--max_workers", "-mw", "int", _("单个下载服务器最大并发下载数量")),
+            (
+                "--max_bandwidth",
+                "-mb",
+                "int",
+                _("下载速度限制，单位：字节/秒，0 表示不限制"),
+            ),
+            (
+                "--video_segments",
+                "-vs",
+                "int",
+                _("视频文件分段下载连接数量，1 表示不分段"),
+            ),
+            ("--file_dedup", "-fd", "bool", _("是否对内容相同的文件去重")),
+            (
+                "--request_rate",
+                "-rr",
+                "float",
+                _("每个服务器每秒最多请求次数，0 表示不限制"),
+            ),
+            ("--request_burst", "-rb", "int", _("每个服务器允许连续请求的次数")),
+            ("--http2", "-h2", "bool", _("是否启用 HTTP/2，需要安装 h2 模块")),
             ("--record_data", "-rd", "bool", _("是否记录作品数据至文件")),
             (
                 "--image_format",
@@ -204,6 +296,18 @@ class CLI:
                     width=55,
                 ),
             ),
+            ("--profile", "-pf", "flag", _("处理完成后显示各处理阶段耗时统计")),
+            (
+                "--profiler",
+                "-pr",
+                "choice",
+                fill(
+                    _(
+                        "使用 cProfile 或 pyinstrument 分析本次运行，结果保存至程序根路径"
+                    ),
+                    width=55,
+                ),
+            ),
             ("--update_settings", "-us", "flag", _("是否更新配置文件")),
             ("--help", "-h", "flag", _("查看详细参数说明")),
             ("--version", "-v", "flag", _("查看 XHS-Downloader 版本")),
@@ -271,6 +375,46 @@ class CLI:
     "-mr",
     type=int,
 )
+@option(
+    "--note_concurrency",
+    "-nc",
+    type=int,
+)
+@option(
+    "--max_workers",
+    "-mw",
+    type=int,
+)
+@option(
+    "--max_bandwidth",
+    "-mb",
+    type=int,
+)
+@option(
+    "--video_segments",
+    "-vs",
+    type=int,
+)
+@option(
+    "--file_dedup",
+    "-fd",
+    type=bool,
+)
+@option(
+    "--request_rate",
+    "-rr",
+    type=float,
+)
+@option(
+    "--request_burst",
+    "-rb",
+    type=int,
+)
+@option(
+    "--http2",
+    "-h2",
+    type=bool,
+)
 @option(
     "--record_data",
     "-rd",
@@ -325,6 +469,17 @@ class CLI:
     ),
     callback=CLI.read_cookie,
 )
+@option(
+    "--profile",
+    "-pf",
+    type=bool,
+    is_flag=True,
+)
+@option(
+    "--profiler",
+    "-pr",
+    type=Choice(["cprofile", "pyinstrument"]),
+)
 @option(
     "--update_settings",
     "-us",
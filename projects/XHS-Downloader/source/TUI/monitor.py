@@ -31,6 +31,7 @@ class Monitor(Screen):
     def compose(self) -> ComposeResult:
         yield Header()
         yield Label(Text(_("已启动监听剪贴板模式"), style=INFO), classes="prompt")
+        yield Label(id="status")
         yield RichLog(markup=True, wrap=True)
         yield Button(_("退出监听剪贴板模式"), id="close")
         yield Footer()
@@ -48,6 +49,16 @@ class Monitor(Screen):
         self.title = PROJECT
         self.xhs.print.func = self.query_one(RichLog)
         self.run_monitor()
+        self.set_interval(1, self.update_status)
+
+    def update_status(self) -> None:
+        status = self.xhs.monitor_status()
+        self.query_one("#status", Label).update(
+            _(
+                "队列中链接：{queue}，正在处理：{active}，已完成：{completed}，"
+                "重复链接：{duplicate}，处理速度：{throughput:.1f} 个/分钟"
+            ).format(**status)
+        )
 
     async def action_close(self):
         self.xhs.stop_monitor()
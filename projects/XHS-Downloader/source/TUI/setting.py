@@ -114,6 +114,16 @@ class Setting(Screen):
                 type="integer",
                 id="max_retry",
             ),
+            Label(
+                _("同时处理的作品数量"),
+                classes="params",
+            ),
+            Input(
+                str(self.data["note_concurrency"]),
+                placeholder="3",
+                type="integer",
+                id="note_concurrency",
+            ),
             Label(),
             Container(
                 Checkbox(
@@ -223,7 +233,8 @@ class Setting(Screen):
     @on(Button.Pressed, "#save")
     def save_settings(self):
         self.dismiss(
-            {
+            self.data
+            | {
                 "mapping_data": self.data.get("mapping_data", {}),
                 "work_path": self.query_one("#work_path").value,
                 "folder_name": self.query_one("#folder_name").value,
@@ -234,6 +245,7 @@ class Setting(Screen):
                 "timeout": int(self.query_one("#timeout").value),
                 "chunk": int(self.query_one("#chunk").value),
                 "max_retry": int(self.query_one("#max_retry").value),
+                "note_concurrency": int(self.query_one("#note_concurrency").value),
                 "record_data": self.query_one("#record_data").value,
                 "image_format": self.query_one("#image_format").value,
                 "folder_mode": self.query_one("#folder_mode").value,
@@ -1,23 +1,29 @@
 from asyncio import (
     Event,
     Queue,
-    QueueEmpty,
+    Semaphore,
     create_task,
     gather,
     sleep,
     Future,
     CancelledError,
+    FIRST_COMPLETED,
+    wait,
 )
+from collections import Counter, deque
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
 from contextlib import suppress
 from datetime import datetime
+from pathlib import Path
 from re import compile
 from urllib.parse import urlparse
 from textwrap import dedent
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, StreamingResponse
 from fastmcp import FastMCP
 from typing import Annotated
 from pydantic import Field
+from time import monotonic
 from types import SimpleNamespace
 from pyperclip import copy, paste
 from uvicorn import Config, Server
@@ -41,14 +47,20 @@ from ..module import (
     VERSION_MINOR,
     WARNING,
     DataRecorder,
+    ExtractBatchItem,
+    ExtractBatchParams,
     ExtractData,
     ExtractParams,
+    HashRecorder,
     IDRecorder,
+    JobRecorder,
+    LinkRecorder,
     Manager,
     MapRecorder,
     logging,
     # sleep_time,
     ScriptServer,
+    SingleFlight,
     INFO,
 )
 from ..translation import _, switch_language
@@ -105,6 +117,7 @@ class XHS:
     SHORT = compile(r"(?:https?://)?xhslink\.com/[^\s\"<>\\^`{|}，。；！？、【】《》]+")
     ID = compile(r"(?:explore|item)/(\S+)?\?")
     ID_USER = compile(r"user/profile/[a-z0-9]+/(\S+)?\?")
+    NOTE_ID = compile(r"[0-9a-f]{24}")
     __INSTANCE = None
     CLEANER = Cleaner()
 
@@ -121,7 +134,7 @@ class XHS:
         name_format="发布时间 作者昵称 作品标题",
         user_agent: str = None,
         cookie: str = "",
-        proxy: str | dict = None,
+        proxy: str | dict | list = None,
         timeout=10,
         chunk=1024 * 1024,
         max_retry=5,
@@ -139,6 +152,21 @@ class XHS:
         script_server: bool = False,
         script_host="0.0.0.0",
         script_port=5558,
+        note_concurrency=3,
+        max_workers=8,
+        max_bandwidth=0,
+        video_segments=4,
+        file_dedup=False,
+        cache_ttl=300,
+        cache_size=1024,
+        cache_persist=False,
+        request_rate=0.5,
+        request_burst=2,
+        cookie_pool: list[str] = None,
+        http2=False,
+        monitor_workers: int = 3,
+        script_workers: int = 3,
+        download_journal: bool = True,
         **kwargs,
     ):
         switch_language(language)
@@ -164,6 +192,21 @@ class XHS:
             author_archive,
             write_mtime,
             script_server,
+            note_concurrency,
+            max_workers,
+            max_bandwidth,
+            video_segments,
+            file_dedup,
+            cache_ttl,
+            cache_size,
+            cache_persist,
+            request_rate,
+            request_burst,
+            cookie_pool,
+            http2,
+            monitor_workers,
+            script_workers,
+            download_journal,
             self.CLEANER,
             self.print,
         )
@@ -177,12 +220,28 @@ class XHS:
         self.video = Video()
         self.explore = Explore()
         self.convert = Converter()
-        self.download = Download(self.manager)
         self.id_recorder = IDRecorder(self.manager)
         self.data_recorder = DataRecorder(self.manager)
+        self.hash_recorder = HashRecorder(self.manager)
+        self.link_recorder = LinkRecorder(self.manager)
+        self.job_recorder = JobRecorder(self.manager)
+        self.download = Download(
+            self.manager,
+            self.hash_recorder,
+            self.job_recorder,
+        )
+        self.fetch_semaphore = Semaphore(self.manager.note_concurrency)
+        self.download_semaphore = Semaphore(self.manager.note_concurrency)
+        # 所有提取任务共用短链接解析并发限制，与请求连接池大小保持一致
+        self.short_semaphore = Semaphore(self.manager.SHORT_CONCURRENCY)
+        self.flight = SingleFlight()
+        self.warm_up_task = None
         self.clipboard_cache: str = ""
         self.queue = Queue()
         self.event = Event()
+        self.monitor_links: set[str] = set()
+        self.monitor_statistics = Counter()
+        self.monitor_start = monotonic()
         self.script = None
         self.init_script_server(
             script_host,
@@ -212,18 +271,23 @@ class XHS:
             if await self.skip_download(i := container["作品ID"]):
                 self.logging(_("作品 {0} 存在下载记录，跳过下载").format(i))
                 count.skip += 1
+                await self.job_recorder.update(i, self.job_recorder.DONE)
             else:
-                __, result = await self.download.run(
-                    u,
-                    container["动图地址"],
-                    index,
-                    container["作者ID"]
-                    + "_"
-                    + self.CLEANER.filter_name(container["作者昵称"]),
-                    name,
-                    container["作品类型"],
-                    container["时间戳"],
-                )
+                await self.job_recorder.update(i, self.job_recorder.RUNNING)
+                with self.manager.metrics.timer("download"):
+                    __, result = await self.flight.run(
+                        ("download", i, tuple(index or ())),
+                        self.download.run,
+                        u,
+                        container["动图地址"],
+                        index,
+                        container["作者ID"]
+                        + "_"
+                        + self.CLEANER.filter_name(container["作者昵称"]),
+                        name,
+                        container["作品类型"],
+                        container["时间戳"],
+                    )
                 if result:
                     count.success += 1
                     await self.__add_record(
@@ -231,9 +295,17 @@ class XHS:
                     )
                 else:
                     count.fail += 1
+                await self.job_recorder.update(
+                    i,
+                    self.job_recorder.DONE if result else self.job_recorder.FAILED,
+                )
         elif not u:
             self.logging(_("提取作品文件下载地址失败"), ERROR)
             count.fail += 1
+            await self.job_recorder.update(
+                container["作品ID"],
+                self.job_recorder.FAILED,
+            )
         await self.save_data(container)
 
     @data_cache
@@ -245,13 +317,15 @@ class XHS:
         data["下载地址"] = " ".join(data["下载地址"])
         data["动图地址"] = " ".join(i or "NaN" for i in data["动图地址"])
         data.pop("时间戳", None)
-        await self.data_recorder.add(**data)
+        with self.manager.metrics.timer("record"):
+            await self.data_recorder.add(**data)
 
     async def __add_record(
         self,
         id_: str,
     ) -> None:
-        await self.id_recorder.add(id_)
+        with self.manager.metrics.timer("record"):
+            await self.id_recorder.add(id_)
 
     async def extract(
         self,
@@ -260,34 +334,149 @@ class XHS:
         index: list | tuple = None,
         data=True,
     ) -> list[dict]:
-        if not (
-            urls := await self.extract_links(
+        return [
+            i
+            async for i in self.extract_iter(
                 url,
+                download,
+                index,
+                data,
+                ordered=True,
             )
-        ):
-            self.logging(_("提取小红书作品链接失败"), WARNING)
-            return []
+        ]
+
+    async def extract_iter(
+        self,
+        urls: str | Iterable[str] | AsyncIterable[str],
+        download=False,
+        index: list | tuple = None,
+        data=True,
+        ordered=False,
+    ) -> AsyncIterator[dict]:
+        """逐个返回作品数据，同时处理中的作品数量有限，适合处理大量作品链接
+
+        urls 可以是包含作品链接的文本，也可以是逐行读取的链接迭代器；
+        ordered 为 False 时按处理完成顺序返回作品数据"""
         statistics = SimpleNamespace(
-            all=len(urls),
+            all=0,
             success=0,
             fail=0,
             skip=0,
         )
-        self.logging(_("共 {0} 个小红书作品待处理...").format(statistics.all))
-        result = [
-            await self.__deal_extract(
-                i,
+
+        async def links() -> AsyncIterator[str]:
+            async for i in self.__iter_links(urls, download):
+                statistics.all += 1
+                yield i
+
+        async def worker(url: str) -> dict:
+            return await self.__deal_extract(
+                url,
                 download,
                 index,
                 data,
                 count=statistics,
             )
-            for i in urls
-        ]
-        self.show_statistics(
-            statistics,
-        )
-        return result
+
+        async for i in self.__bounded_map(links(), worker, ordered):
+            yield i
+        if statistics.all:
+            self.show_statistics(
+                statistics,
+            )
+        else:
+            self.logging(_("提取小红书作品链接失败"), WARNING)
+
+    async def __iter_links(
+        self,
+        urls: str | Iterable[str] | AsyncIterable[str],
+        plan=False,
+    ) -> AsyncIterator[str]:
+        if isinstance(urls, str):
+            if links := await self.extract_links(urls):
+                self.logging(_("共 {0} 个小红书作品待处理...").format(len(links)))
+            batches = self.__async_iter((links,))
+        else:
+            batches = self.__extract_batches(urls)
+        async for links in batches:
+            if plan:
+                # 开始处理前记录计划下载的作品，程序异常退出后可以继续下载
+                await self.__plan_jobs(links)
+            for i in links:
+                yield i
+
+    async def __extract_batches(
+        self,
+        urls: Iterable[str] | AsyncIterable[str],
+    ) -> AsyncIterator[list[str]]:
+        if not isinstance(urls, AsyncIterable):
+            urls = self.__async_iter(urls)
+        async for i in urls:
+            yield await self.extract_links(i)
+
+    async def __plan_jobs(self, links: list[str]) -> None:
+        for i in links:
+            if self.NOTE_ID.fullmatch(id_ := self.__extract_link_id(i)):
+                await self.job_recorder.add(id_, i)
+
+    async def resume(self, data=False) -> None:
+        """继续下载下载任务日志中未完成的作品，已下载的缓存文件从断点处继续下载"""
+        if not (urls := await self.job_recorder.unfinished()):
+            self.logging(_("没有未完成的下载任务"))
+            return
+        self.logging(_("共 {0} 个未完成的作品，继续下载...").format(len(urls)))
+        async for __ in self.extract_iter(
+            urls,
+            True,
+            data=data,
+        ):
+            pass
+
+    async def __bounded_map(
+        self,
+        items: Iterable | AsyncIterable,
+        function: Callable,
+        ordered=False,
+    ) -> AsyncIterator:
+        """按需读取输入并限制同时处理的数量，处理完成后立即返回结果，不保留已返回的结果"""
+        # 获取、解析、下载分阶段限流，窗口限制同时处理中的作品数量
+        window = self.manager.note_concurrency * 2
+        pending = deque() if ordered else set()
+
+        async def drain(limit: int) -> AsyncIterator:
+            while len(pending) > limit:
+                if ordered:
+                    result = await pending[0]
+                    pending.popleft()
+                    yield result
+                    continue
+                done, __ = await wait(pending, return_when=FIRST_COMPLETED)
+                for task in done:
+                    pending.discard(task)
+                    yield task.result()
+
+        if not isinstance(items, AsyncIterable):
+            items = self.__async_iter(items)
+        try:
+            async for item in items:
+                async for result in drain(window - 1):
+                    yield result
+                task = create_task(function(item))
+                if ordered:
+                    pending.append(task)
+                else:
+                    pending.add(task)
+            async for result in drain(0):
+                yield result
+        finally:
+            # 调用方停止迭代时取消未完成的作品
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def __async_iter(items: Iterable) -> AsyncIterator:
+        for i in items:
+            yield i
 
     def show_statistics(
         self,
@@ -323,37 +512,26 @@ class XHS:
                 data,
             )
         else:
-            statistics = SimpleNamespace(
-                all=len(url),
-                success=0,
-                fail=0,
-                skip=0,
-            )
-            [
-                await self.__deal_extract(
-                    u,
-                    download,
-                    index,
-                    data,
-                    count=statistics,
-                )
-                for u in url
-            ]
-            self.show_statistics(
-                statistics,
-            )
+            async for __ in self.extract_iter(
+                url,
+                download,
+                index,
+                data,
+            ):
+                pass
 
     async def extract_links(
         self,
         url: str,
     ) -> list:
         urls = []
-        for i in url.split():
+        items = url.split()
+        links = await self.__resolve_short_links(
+            {u.group() for i in items if (u := self.SHORT.search(i))}
+        )
+        for i in items:
             if u := self.SHORT.search(i):
-                i = await self.html.request_url(
-                    u.group(),
-                    False,
-                )
+                i = links[u.group()]
             if u := self.SHARE.search(i):
                 urls.append(u.group())
             elif u := self.LINK.search(i):
@@ -362,6 +540,24 @@ class XHS:
                 urls.append(u.group())
         return urls
 
+    async def __resolve_short_links(self, links: set[str]) -> dict[str, str]:
+        """并发解析短链接，解析结果永久缓存"""
+
+        async def resolve(link: str) -> str:
+            if row := await self.link_recorder.select(link):
+                return row[0]
+            async with self.short_semaphore:
+                url = await self.html.request_url(
+                    link,
+                    False,
+                )
+            if self.SHARE.search(url) or self.LINK.search(url) or self.USER.search(url):
+                await self.link_recorder.add(link, url)
+            return url
+
+        links = list(links)
+        return dict(zip(links, await gather(*(resolve(i) for i in links))))
+
     def extract_id(self, links: list[str]) -> list[str]:
         ids = []
         for i in links:
@@ -389,26 +585,61 @@ class XHS:
             self.logging(msg)
             count.skip += 1
             return id_, {"message": msg}
-        self.logging(_("开始处理作品：{0}").format(id_))
-        html = await self.html.request_url(
+        # 同一作品的并发请求共享一次获取与解析
+        namespace = await self.flight.run(
+            ("fetch", id_, cookie, proxy),
+            self.__fetch_data_object,
             url,
-            cookie=cookie,
-            proxy=proxy,
+            id_,
+            cookie,
+            proxy,
         )
-        namespace = self.__generate_data_object(html)
         if not namespace:
             self.logging(_("{0} 获取数据失败").format(id_), ERROR)
             count.fail += 1
             return id_, {}
         return id_, namespace
 
+    async def __fetch_data_object(
+        self,
+        url: str,
+        id_: str,
+        cookie: str = None,
+        proxy: str = None,
+    ) -> Namespace:
+        # 未指定 Cookie 与代理时由 Cookie 池中的会话轮流请求
+        session = None if cookie or proxy else self.manager.session_pool.select()
+        metrics = self.manager.metrics
+        async with metrics.acquire("wait.fetch", self.fetch_semaphore):
+            self.logging(_("开始处理作品：{0}").format(id_))
+            with metrics.timer("fetch"):
+                html = await self.html.request_url(
+                    url,
+                    cookie=cookie,
+                    proxy=proxy,
+                    session=session,
+                )
+        namespace = self.__generate_data_object(html)
+        if session and self.manager.session_pool.feedback(
+            session,
+            bool(namespace) if html else None,
+        ):
+            self.logging(
+                _("Cookie 池第 {0} 个会话连续获取数据失败，已停止使用").format(
+                    session.number
+                ),
+                WARNING,
+            )
+        return namespace
+
     def _extract_data(
         self,
         namespace: Namespace,
         id_: str,
         count,
     ):
-        data = self.explore.run(namespace)
+        with self.manager.metrics.timer("explore"):
+            data = self.explore.run(namespace)
         if not data:
             self.logging(_("{0} 提取数据失败").format(id_), ERROR)
             count.fail += 1
@@ -424,26 +655,31 @@ class XHS:
         index: list | tuple | None,
         count: SimpleNamespace,
     ):
-        if data["作品类型"] == _("视频"):
-            self.__extract_video(data, namespace)
-        elif data["作品类型"] in {
-            _("图文"),
-            _("图集"),
-        }:
-            self.__extract_image(data, namespace)
-        else:
-            self.logging(_("未知的作品类型：{0}").format(id_), WARNING)
-            data["下载地址"] = []
-            data["动图地址"] = []
+        with self.manager.metrics.timer("links"):
+            if data["作品类型"] == _("视频"):
+                self.__extract_video(data, namespace)
+            elif data["作品类型"] in {
+                _("图文"),
+                _("图集"),
+            }:
+                self.__extract_image(data, namespace)
+            else:
+                self.logging(_("未知的作品类型：{0}").format(id_), WARNING)
+                data["下载地址"] = []
+                data["动图地址"] = []
         await self.update_author_nickname(
             data,
         )
-        await self.__download_files(
-            data,
-            download,
-            index,
-            count,
-        )
+        async with self.manager.metrics.acquire(
+            "wait.download",
+            self.download_semaphore,
+        ):
+            await self.__download_files(
+                data,
+                download,
+                index,
+                count,
+            )
         # await sleep_time()
         return data
 
@@ -490,6 +726,42 @@ class XHS:
         self.logging(_("作品处理完成：{0}").format(id_))
         return data
 
+    async def __deal_extract_cached(
+        self,
+        url: str,
+        download: bool,
+        index: list | tuple | None,
+        data: bool,
+        cookie: str = None,
+        proxy: str = None,
+        bypass: bool = False,
+    ):
+        """API 与 MCP 模式处理作品，仅获取作品数据时优先读取缓存"""
+        cache = self.manager.detail_cache
+        if not cache:
+            return await self.__deal_extract(
+                url,
+                download,
+                index,
+                data,
+                cookie,
+                proxy,
+            )
+        key = cache.key(self.__extract_link_id(url), cookie)
+        if not (download or bypass) and data and (result := cache.get(key)):
+            return result
+        result = await self.__deal_extract(
+            url,
+            download,
+            index,
+            data,
+            cookie,
+            proxy,
+        )
+        if result and "作品ID" in result:
+            cache.set(key, result)
+        return result
+
     async def deal_script_tasks(
         self,
         data: dict,
@@ -545,7 +817,8 @@ class XHS:
         return link.path.split("/")[-1]
 
     def __generate_data_object(self, html: str) -> Namespace:
-        data = self.convert.run(html)
+        with self.manager.metrics.timer("convert"):
+            data = self.convert.run(html)
         return Namespace(data)
 
     def __naming_rules(self, data: dict) -> str:
@@ -598,43 +871,89 @@ class XHS:
             style=MASTER,
         )
         self.event.clear()
+        self.monitor_links.clear()
+        self.monitor_statistics.clear()
+        self.monitor_start = monotonic()
         copy("")
-        await gather(
-            self.__get_link(delay),
-            self.__receive_link(delay, download=download, index=None, data=data),
-        )
+        workers = [
+            create_task(
+                self.__receive_link(download=download, index=None, data=data),
+            )
+            for __ in range(self.manager.monitor_workers)
+        ]
+        try:
+            await self.__get_link(delay)
+            # 停止监听后继续处理队列中剩余的链接
+            await self.queue.join()
+        finally:
+            for i in workers:
+                i.cancel()
+            await gather(*workers, return_exceptions=True)
 
     async def __get_link(self, delay: int):
+        tasks = set()
         while not self.event.is_set():
             if (t := paste()).lower() == "close":
                 self.stop_monitor()
             elif t != self.clipboard_cache:
                 self.clipboard_cache = t
-                create_task(self.__push_link(t))
+                tasks.add(task := create_task(self.__push_link(t)))
+                task.add_done_callback(tasks.discard)
             await sleep(delay)
+        await gather(*tasks)
 
     async def __push_link(
         self,
         content: str,
     ):
-        await gather(
-            *[
-                self.queue.put(i)
-                for i in await self.extract_links(
-                    content,
-                )
-            ]
-        )
+        for i in await self.extract_links(
+            content,
+        ):
+            # 跳过本次监听期间已加入队列的链接
+            if i in self.monitor_links:
+                self.monitor_statistics["duplicate"] += 1
+                continue
+            self.monitor_links.add(i)
+            self.monitor_statistics["queued"] += 1
+            self.queue.put_nowait(i)
 
-    async def __receive_link(self, delay: int, *args, **kwargs):
-        while not self.event.is_set() or self.queue.qsize() > 0:
-            with suppress(QueueEmpty):
-                await self.__deal_extract(self.queue.get_nowait(), *args, **kwargs)
-            await sleep(delay)
+    async def __receive_link(self, *args, **kwargs):
+        while True:
+            url = await self.queue.get()
+            self.monitor_statistics["active"] += 1
+            try:
+                await self.__deal_extract(url, *args, **kwargs)
+            finally:
+                self.monitor_statistics["active"] -= 1
+                self.monitor_statistics["completed"] += 1
+                self.queue.task_done()
+
+    def monitor_status(self) -> dict:
+        """返回监听剪贴板模式的队列长度、处理中链接数量与每分钟处理链接数量"""
+        elapsed = max(monotonic() - self.monitor_start, 1)
+        return {
+            "queue": self.queue.qsize(),
+            "active": self.monitor_statistics["active"],
+            "completed": self.monitor_statistics["completed"],
+            "duplicate": self.monitor_statistics["duplicate"],
+            "throughput": self.monitor_statistics["completed"] * 60 / elapsed,
+        }
 
     def stop_monitor(self):
         self.event.set()
 
+    def statistics(self) -> dict:
+        """汇总各处理阶段耗时与各模块的运行统计"""
+        return self.manager.metrics.report() | {
+            "retry": dict(self.manager.retry_policy.statistics),
+            "rate_limit": dict(self.manager.limiter.statistics),
+            "host_concurrency": self.manager.scheduler.statistics(),
+            "single_flight": dict(self.flight.statistics),
+            "converter": dict(self.convert.statistics),
+            "download_record": dict(self.id_recorder.statistics),
+            "cache": self.manager.detail_cache.report(),
+        }
+
     async def skip_download(self, id_: str) -> bool:
         return bool(await self.id_recorder.select(id_))
 
@@ -642,15 +961,31 @@ class XHS:
         await self.id_recorder.__aenter__()
         await self.data_recorder.__aenter__()
         await self.map_recorder.__aenter__()
+        await self.hash_recorder.__aenter__()
+        await self.link_recorder.__aenter__()
+        await self.job_recorder.__aenter__()
+        # 未开启下载任务日志时无法判断缓存文件是否仍需继续下载，全部保留
+        if self.manager.download_journal and (
+            count := self.manager.clean_temp(await self.job_recorder.active_files())
+        ):
+            self.logging(_("已删除 {0} 个过期的缓存文件").format(count))
+        self.manager.detail_cache.load()
+        self.warm_up_task = create_task(self.manager.warm_up())
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
         await self.id_recorder.__aexit__(exc_type, exc_value, traceback)
         await self.data_recorder.__aexit__(exc_type, exc_value, traceback)
         await self.map_recorder.__aexit__(exc_type, exc_value, traceback)
+        await self.hash_recorder.__aexit__(exc_type, exc_value, traceback)
+        await self.link_recorder.__aexit__(exc_type, exc_value, traceback)
+        await self.job_recorder.__aexit__(exc_type, exc_value, traceback)
         await self.close()
 
     async def close(self):
+        if self.warm_up_task:
+            self.warm_up_task.cancel()
+        self.manager.detail_cache.save()
         await self.stop_script_server()
         await self.manager.close()
 
@@ -667,6 +1002,27 @@ class XHS:
             else ""
         )
 
+    async def deduplicate(self, folder: str = ""):
+        folder = Path(folder) if folder else self.manager.folder
+        count, size = await self.download.deduplicate(
+            folder,
+            [
+                i.file
+                for i in (
+                    self.id_recorder,
+                    self.data_recorder,
+                    self.map_recorder,
+                    self.hash_recorder,
+                    self.link_recorder,
+                    self.job_recorder,
+                )
+            ],
+        )
+        logging(
+            self.print,
+            _("文件去重完成，共替换 {0} 个文件，释放 {1} 字节").format(count, size),
+        )
+
     async def run_api_server(
         self,
         host="0.0.0.0",
@@ -714,6 +1070,7 @@ class XHS:
                 - **cookie**: 请求数据时使用的 Cookie；可选参数
                 - **proxy**: 请求数据时使用的代理；可选参数
                 - **skip**: 是否跳过存在下载记录的作品；设置为 true 将不会返回存在下载记录的作品数据；可选参数
+                - **bypass_cache**: 是否跳过缓存重新获取作品数据；可选参数
                 """)
             ),
             tags=["API"],
@@ -727,19 +1084,100 @@ class XHS:
             if not url:
                 msg = _("提取小红书作品链接失败")
             else:
-                if data := await self.__deal_extract(
+                if data := await self.__deal_extract_cached(
                     url[0],
                     extract.download,
                     extract.index,
                     not extract.skip,
                     extract.cookie,
                     extract.proxy,
+                    extract.bypass_cache,
                 ):
                     msg = _("获取小红书作品数据成功")
                 else:
                     msg = _("获取小红书作品数据失败")
             return ExtractData(message=msg, params=extract, data=data)
 
+        @server.post(
+            "/xhs/detail/batch",
+            summary=_("批量获取作品数据及下载地址"),
+            description=_(
+                dedent("""
+                **参数**:
+                        
+                - **urls**: 小红书作品链接或作品 ID 列表，每项仅处理第一个链接；必需参数
+                - **download**: 是否下载作品文件；设置为 true 将会耗费更多时间；可选参数
+                - **index**: 下载指定序号的图片文件，仅对图文作品生效；download 参数设置为 false 时不生效；可选参数
+                - **cookie**: 请求数据时使用的 Cookie；可选参数
+                - **proxy**: 请求数据时使用的代理；可选参数
+                - **skip**: 是否跳过存在下载记录的作品；设置为 true 将不会返回存在下载记录的作品数据；可选参数
+                - **bypass_cache**: 是否跳过缓存重新获取作品数据；可选参数
+                
+                以 NDJSON 格式逐行返回结果，每个作品处理完成后立即返回，返回顺序与请求顺序无关，index 为该作品在 urls 中的序号
+                """)
+            ),
+            tags=["API"],
+            response_class=StreamingResponse,
+        )
+        async def handle_batch(extract: ExtractBatchParams):
+            return StreamingResponse(
+                self.__deal_extract_stream(extract),
+                media_type="application/x-ndjson",
+            )
+
+        @server.get(
+            "/xhs/detail/cache",
+            summary=_("获取作品数据缓存统计"),
+            description=_("返回作品数据缓存数量、命中次数、未命中次数与命中率"),
+            tags=["API"],
+        )
+        async def cache_statistics():
+            return self.manager.detail_cache.report()
+
+        @server.get(
+            "/xhs/statistics",
+            summary=_("获取运行统计数据"),
+            description=_(
+                "返回各处理阶段的次数与耗时、下载字节数、重试次数与等待时间等统计数据"
+            ),
+            tags=["API"],
+        )
+        async def statistics():
+            return self.statistics()
+
+    async def __deal_extract_stream(self, extract: ExtractBatchParams):
+        async def worker(item: tuple[int, str]) -> ExtractBatchItem:
+            index, url = item
+            data = None
+            try:
+                if self.NOTE_ID.fullmatch(url):
+                    links = [f"https://www.xiaohongshu.com/explore/{url}"]
+                else:
+                    links = await self.extract_links(url)
+                if not links:
+                    msg = _("提取小红书作品链接失败")
+                elif data := await self.__deal_extract_cached(
+                    links[0],
+                    extract.download,
+                    extract.index,
+                    not extract.skip,
+                    extract.cookie,
+                    extract.proxy,
+                    extract.bypass_cache,
+                ):
+                    msg = _("获取小红书作品数据成功")
+                else:
+                    msg = _("获取小红书作品数据失败")
+            except Exception as error:
+                # 单个作品异常不影响其他作品，错误信息随结果返回
+                data = None
+                msg = repr(error)
+            return ExtractBatchItem(index=index, url=url, message=msg, data=data)
+
+        # 客户端断开连接时停止迭代并取消未完成的作品
+        async for item in self.__bounded_map(enumerate(extract.urls), worker):
+            yield item.model_dump_json() + "\n"
+
     async def run_mcp_server(
         self,
         transport="streamable-http",
@@ -788,6 +1226,7 @@ class XHS:
                 - https://www.xiaohongshu.com/explore/...
                 - https://www.xiaohongshu.com/discovery/item/...
                 - https://xhslink.com/...
+                bypass_cache（可选）：是否跳过缓存重新获取作品数据，默认值为 false
                 
                 返回：
                 - message：结果提示
@@ -808,11 +1247,16 @@ class XHS:
         )
         async def get_detail_data(
             url: Annotated[str, Field(description=_("小红书作品链接"))],
+            bypass_cache: Annotated[
+                bool,
+                Field(default=False, description=_("是否跳过缓存重新获取作品数据")),
+            ],
         ) -> dict:
             msg, data = await self.deal_detail_mcp(
                 url,
                 False,
                 None,
+                bypass_cache,
             )
             return {
                 "message": msg,
@@ -906,6 +1350,7 @@ class XHS:
         url: str,
         download: bool,
         index: list[str | int] | None,
+        bypass_cache: bool = False,
     ):
         data = None
         url = await self.extract_links(
@@ -913,11 +1358,12 @@ class XHS:
         )
         if not url:
             msg = _("提取小红书作品链接失败")
-        elif data := await self.__deal_extract(
+        elif data := await self.__deal_extract_cached(
             url[0],
             download,
             index,
             True,
+            bypass=bypass_cache,
         ):
             msg = _("获取小红书作品数据成功")
         else:
@@ -961,7 +1407,7 @@ class XHS:
         host="0.0.0.0",
         port=5558,
     ):
-        async with ScriptServer(self, host, port):
+        async with ScriptServer(self, host, port, self.manager.script_workers):
             await Future()
 
     async def stop_script_server(self):
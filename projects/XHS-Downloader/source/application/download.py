@@ -1,18 +1,24 @@
-from asyncio import Semaphore, gather
+from asyncio import Lock, TaskGroup, gather, to_thread
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from glob import escape
+from hashlib import file_digest, sha256
+from os import link, replace, scandir, walk
 from pathlib import Path
+from time import perf_counter
 from typing import TYPE_CHECKING, Any
 
 from aiofiles import open
-from httpx import HTTPError
+from httpx import HTTPError, HTTPStatusError, PoolTimeout, TransportError
 
-from ..expansion import CacheError
+from ..expansion import CacheError, SegmentError
 
 # from ..module import WARNING
 from ..module import (
     ERROR,
     FILE_SIGNATURES,
     FILE_SIGNATURES_LENGTH,
-    MAX_WORKERS,
+    SingleFlight,
     logging,
     # sleep_time,
 )
@@ -22,13 +28,35 @@ from ..translation import _
 if TYPE_CHECKING:
     from httpx import AsyncClient
 
-    from ..module import Manager
+    from ..module import HashRecorder, JobRecorder, Manager
 
 __all__ = ["Download"]
 
 
+class DirectoryNames:
+    """文件夹内的文件名集合，文件系统不区分大小写时忽略大小写比较"""
+
+    __slots__ = ("names", "folded")
+
+    def __init__(self, names: set[str], folded: bool):
+        self.folded = folded
+        self.names = {i.casefold() for i in names} if folded else names
+
+    def __contains__(self, name: str) -> bool:
+        return (name.casefold() if self.folded else name) in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def add(self, name: str) -> None:
+        self.names.add(name.casefold() if self.folded else name)
+
+
 class Download:
-    SEMAPHORE = Semaphore(MAX_WORKERS)
+    SEGMENT_THRESHOLD = 16 * 1024 * 1024
+    DIRECTORY_CACHE = 64
+    # SQLite 数据库及其日志文件，去重时跳过
+    DATABASE_SUFFIXES = {".db", ".db-wal", ".db-shm", ".db-journal"}
     CONTENT_TYPE_MAP = {
         "image/png": "png",
         "image/jpeg": "jpeg",
@@ -42,15 +70,24 @@ class Download:
     def __init__(
         self,
         manager: "Manager",
+        recorder: "HashRecorder",
+        journal: "JobRecorder",
     ):
         self.manager = manager
+        self.recorder = recorder
+        self.journal = journal
         self.print = manager.print
         self.folder = manager.folder
         self.temp = manager.temp
         self.chunk = manager.chunk
         self.client: "AsyncClient" = manager.download_client
+        self.scheduler = manager.scheduler
+        self.limiter = manager.limiter
+        self.metrics = manager.metrics
+        self.flight = SingleFlight()
         self.headers = manager.blank_headers
         self.retry = manager.retry
+        self.retry_policy = manager.retry_policy
         self.folder_mode = manager.folder_mode
         self.video_format = "mp4"
         self.live_format = "mp4"
@@ -67,6 +104,11 @@ class Download:
         self.live_download = manager.live_download
         self.author_archive = manager.author_archive
         self.write_mtime = manager.write_mtime
+        self.video_segments = manager.video_segments
+        # 下载文件夹文件名索引：路径 -> (文件夹修改时间, 文件名集合)
+        # 正在保存的文件摘要：摘要 -> [锁, 等待数量]
+        self.digest_locks: dict[str, list] = {}
+        self.directories: OrderedDict[Path, tuple[int, DirectoryNames]] = OrderedDict()
 
     async def run(
         self,
@@ -79,7 +121,7 @@ class Download:
         mtime: int,
     ) -> tuple[Path, list[Any]]:
         path = self.__generate_path(nickname, filename)
-        if type_ == _("视频"):
+        if video := type_ == _("视频"):
             tasks = self.__ready_download_video(
                 urls,
                 path,
@@ -98,13 +140,23 @@ class Download:
             )
         else:
             raise ValueError
+        for url, name, format_ in tasks:
+            await self.journal.update_file(
+                f"{name}.{format_}",
+                url,
+                self.journal.PLANNED,
+            )
+        # 写入同一临时文件的并发下载任务仅执行一次，避免断点续传数据错乱
         tasks = [
-            self.__download(
+            self.flight.run(
+                self.temp.joinpath(f"{name}.{format_}"),
+                self.__download,
                 url,
                 path,
                 name,
                 format_,
                 mtime,
+                video,
             )
             for url, name, format_ in tasks
         ]
@@ -131,7 +183,7 @@ class Download:
             logging(self.print, _("视频作品下载功能已关闭，跳过下载"))
             return []
         if self.__check_exists_path(
-            path,
+            self.__directory_names(path),
             f"{name}.{self.video_format}",
         ):
             return []
@@ -149,13 +201,14 @@ class Download:
         if not self.image_download:
             logging(self.print, _("图文作品下载功能已关闭，跳过下载"))
             return tasks
+        names = self.__directory_names(path)
         for i, j in enumerate(zip(urls, lives), start=1):
             if index and i not in index:
                 continue
             file = f"{name}_{i}"
             if not any(
                 self.__check_exists_path(
-                    path,
+                    names,
                     f"{file}.{s}",
                 )
                 for s in self.image_format_list
@@ -165,7 +218,7 @@ class Download:
                 not self.live_download
                 or not j[1]
                 or self.__check_exists_path(
-                    path,
+                    names,
                     f"{file}.{self.live_format}",
                 )
             ):
@@ -185,14 +238,50 @@ class Download:
 
     def __check_exists_path(
         self,
-        path: Path,
+        names: DirectoryNames | set[str],
         name: str,
     ) -> bool:
-        if path.joinpath(name).exists():
+        if name in names:
             logging(self.print, _("{0} 文件已存在，跳过下载").format(name))
             return True
         return False
 
+    def __directory_names(self, path: Path) -> DirectoryNames | set[str]:
+        """返回文件夹内的文件名集合，文件夹修改时间未变化时复用上次扫描结果"""
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return set()
+        if (cache := self.directories.get(path)) and cache[0] == mtime:
+            self.directories.move_to_end(path)
+            return cache[1]
+        with scandir(path) as entries:
+            names = {i.name for i in entries}
+        names = DirectoryNames(names, self.__case_insensitive(path, names))
+        self.directories[path] = (mtime, names)
+        self.directories.move_to_end(path)
+        if len(self.directories) > self.DIRECTORY_CACHE:
+            self.directories.popitem(last=False)
+        return names
+
+    @staticmethod
+    def __case_insensitive(path: Path, names: set[str]) -> bool:
+        """使用文件夹内已有文件名的大小写变体判断文件系统是否区分大小写"""
+        for name in names:
+            if (other := name.swapcase()) != name and other not in names:
+                return path.joinpath(other).exists()
+        return False
+
+    def __record_file(self, file: Path) -> None:
+        """下载文件写入后同步更新文件名索引，避免重新扫描文件夹"""
+        if not (cache := self.directories.get(path := file.parent)):
+            return
+        cache[1].add(file.name)
+        try:
+            self.directories[path] = (path.stat().st_mtime_ns, cache[1])
+        except OSError:
+            self.directories.pop(path, None)
+
     @re_download
     async def __download(
         self,
@@ -201,70 +290,379 @@ class Download:
         name: str,
         format_: str,
         mtime: int,
+        video: bool = False,
     ):
-        async with self.SEMAPHORE:
-            headers = self.headers.copy()
-            temp = self.temp.joinpath(f"{name}.{format_}")
-            self.__update_headers_range(
-                headers,
+        # 下载服务器要求退避时暂停请求，下载频率由调度器控制
+        await self.limiter.acquire(url, False)
+        temp = self.temp.joinpath(f"{name}.{format_}")
+        hasher = sha256() if self.recorder.switch else None
+        head = None
+        await self.journal.update_file(
+            temp.name,
+            url,
+            self.journal.RUNNING,
+        )
+        try:
+            if not video or not await self.__download_segments(
+                url,
                 temp,
-            )
-            try:
-                async with self.client.stream(
-                    "GET",
+                hasher,
+            ):
+                head = await self.__download_stream(
                     url,
-                    headers=headers,
-                ) as response:
-                    # await sleep_time()
-                    if response.status_code == 416:
-                        raise CacheError(
-                            _("文件 {0} 缓存异常，重新下载").format(temp.name),
-                        )
-                    response.raise_for_status()
-                    # self.__create_progress(
-                    #     bar,
-                    #     int(
-                    #         response.headers.get(
-                    #             'content-length', 0)) or None,
-                    # )
-                    async with open(temp, "ab") as f:
-                        async for chunk in response.aiter_bytes(self.chunk):
-                            await f.write(chunk)
-                            # self.__update_progress(bar, len(chunk))
-                real = await self.__suffix_with_file(
                     temp,
-                    path,
-                    name,
-                    # suffix,
-                    format_,
+                    hasher,
                 )
-                self.manager.move(
-                    temp,
-                    real,
-                    mtime,
-                    self.write_mtime,
+            real = await self.__suffix_with_file(
+                temp,
+                path,
+                name,
+                # suffix,
+                format_,
+                head,
+            )
+            await self.__save_file(hasher, temp, real, mtime)
+            self.__record_file(real)
+            await self.journal.update_file(
+                temp.name,
+                url,
+                self.journal.DONE,
+            )
+            # self.__create_progress(bar, None)
+            logging(self.print, _("文件 {0} 下载成功").format(real.name))
+            self.metrics.count("download.success")
+            self.limiter.feedback(url, 200)
+            return True
+        except HTTPError as error:
+            self.retry_policy.record(error)
+            self.metrics.count("download.failure")
+            # 保留已下载的缓存文件，继续下载时从断点处开始
+            await self.journal.update_file(
+                temp.name,
+                url,
+                self.journal.FAILED,
+            )
+            if isinstance(error, HTTPStatusError):
+                self.limiter.feedback(
+                    url,
+                    error.response.status_code,
+                    error.response.headers.get("Retry-After"),
                 )
-                # self.__create_progress(bar, None)
-                logging(self.print, _("文件 {0} 下载成功").format(real.name))
-                return True
+            # self.__create_progress(bar, None)
+            logging(
+                self.print,
+                _("网络异常，{0} 下载失败，错误信息: {1}").format(name, repr(error)),
+                ERROR,
+            )
+            return False
+        except CacheError as error:
+            self.retry_policy.record(error)
+            self.metrics.count("download.failure")
+            self.manager.delete(temp)
+            await self.journal.update_file(
+                temp.name,
+                url,
+                self.journal.FAILED,
+            )
+            logging(
+                self.print,
+                str(error),
+                ERROR,
+            )
+            return False
+
+    @asynccontextmanager
+    async def __host_slot(self, url: str):
+        """占用下载服务器的一个连接，按下载结果调整该服务器的并发限制"""
+        start = perf_counter()
+        async with self.scheduler.slot(url) as slot:
+            self.metrics.record("wait.host", perf_counter() - start)
+            try:
+                yield slot
             except HTTPError as error:
-                # self.__create_progress(bar, None)
-                logging(
-                    self.print,
-                    _("网络异常，{0} 下载失败，错误信息: {1}").format(
-                        name, repr(error)
-                    ),
-                    ERROR,
+                slot.failure(self.__is_congestion(error))
+                raise
+            else:
+                slot.success()
+            finally:
+                self.metrics.count("download.bytes", slot.size)
+
+    async def __download_stream(
+        self,
+        url: str,
+        temp: Path,
+        hasher=None,
+    ) -> bytes | None:
+        """返回文件开头用于判断文件格式的数据，断点续传时返回 None"""
+        headers = self.headers.copy()
+        head = None
+        if self.__update_headers_range(
+            headers,
+            temp,
+        ):
+            if hasher:
+                # 断点续传时先计算已下载部分的摘要
+                await self.__hash_file(temp, hasher)
+        else:
+            head = b""
+        async with (
+            self.__host_slot(url) as slot,
+            self.client.stream(
+                "GET",
+                url,
+                headers=headers,
+            ) as response,
+        ):
+            # await sleep_time()
+            if response.status_code == 416:
+                raise CacheError(
+                    _("文件 {0} 缓存异常，重新下载").format(temp.name),
                 )
-                return False
-            except CacheError as error:
-                self.manager.delete(temp)
+            response.raise_for_status()
+            # self.__create_progress(
+            #     bar,
+            #     int(
+            #         response.headers.get(
+            #             'content-length', 0)) or None,
+            # )
+            async with open(temp, "ab") as f:
+                async for chunk in response.aiter_bytes(self.chunk):
+                    await f.write(chunk)
+                    if hasher:
+                        hasher.update(chunk)
+                    if head is not None and len(head) < FILE_SIGNATURES_LENGTH:
+                        head += chunk[: FILE_SIGNATURES_LENGTH - len(head)]
+                    slot.record(len(chunk))
+                    await self.scheduler.throttle(len(chunk))
+                    # self.__update_progress(bar, len(chunk))
+        return head
+
+    async def __download_segments(
+        self,
+        url: str,
+        temp: Path,
+        hasher=None,
+    ) -> bool:
+        """大体积视频文件按字节范围分段并发下载，返回 False 时使用单连接下载"""
+        if self.video_segments < 2:
+            return False
+        parts = self.__segment_files(temp)
+        if temp.exists() and not parts:
+            return False
+        try:
+            length, __ = await self.__head_file(url, self.headers, self.video_format)
+        except HTTPError:
+            if parts:
+                raise
+            return False
+        if length < self.SEGMENT_THRESHOLD:
+            self.__delete_files(parts)
+            return False
+        size = -(-length // self.video_segments)
+        # 每个分段写入独立的缓存文件，文件名包含字节范围，下载失败后从各分段断点处继续
+        segments = {
+            temp.with_name(f"{temp.name}.{start}-{end}.part"): (start, end)
+            for start in range(0, length, size)
+            if (end := min(start + size, length) - 1) >= start
+        }
+        self.__delete_files(i for i in parts if i not in segments)
+        try:
+            async with TaskGroup() as group:
+                for part, (start, end) in segments.items():
+                    group.create_task(
+                        self.__download_segment(
+                            url,
+                            part,
+                            start,
+                            end,
+                        )
+                    )
+        except ExceptionGroup as group:
+            __, error = group.split(SegmentError)
+            if error:
+                raise error.exceptions[0]
+            # 服务器不支持范围请求，回退至单连接下载
+            self.__delete_files(segments)
+            return False
+        await to_thread(self.__merge_segments, temp, list(segments), hasher)
+        if (real := temp.stat().st_size) != length:
+            raise CacheError(
+                _("文件 {0} 大小异常，预期 {1} 字节，实际 {2} 字节").format(
+                    temp.name, length, real
+                ),
+            )
+        return True
+
+    async def __download_segment(
+        self,
+        url: str,
+        part: Path,
+        start: int,
+        end: int,
+    ) -> None:
+        length = end - start + 1
+        if (received := self.__get_resume_byte_position(part)) > length:
+            self.manager.delete(part)
+            received = 0
+        if received == length:
+            return
+        # 每个分段占用一个下载服务器连接，与单连接下载共用并发限制
+        async with (
+            self.__host_slot(url) as slot,
+            self.client.stream(
+                "GET",
+                url,
+                headers=self.headers | {"Range": f"bytes={start + received}-{end}"},
+            ) as response,
+        ):
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise SegmentError(url)
+            async with open(part, "ab") as f:
+                async for chunk in response.aiter_bytes(self.chunk):
+                    await f.write(chunk)
+                    received += len(chunk)
+                    slot.record(len(chunk))
+                    await self.scheduler.throttle(len(chunk))
+        if received != length:
+            raise CacheError(
+                _("文件 {0} 分段下载不完整，重新下载").format(part.name),
+            )
+
+    def __merge_segments(self, temp: Path, parts: list[Path], hasher=None) -> None:
+        """将后续分段依次追加至首个分段，合并完成后重命名为缓存文件"""
+        first, *others = parts
+        with first.open("r+b" if hasher else "ab") as f:
+            # 不计算摘要时直接追加，无需读取首个分段
+            while hasher and (chunk := f.read(self.chunk)):
+                hasher.update(chunk)
+            for part in others:
+                with part.open("rb") as source:
+                    while chunk := source.read(self.chunk):
+                        f.write(chunk)
+                        if hasher:
+                            hasher.update(chunk)
+                part.unlink()
+        replace(first, temp)
+
+    @staticmethod
+    def __segment_files(temp: Path) -> list[Path]:
+        return list(temp.parent.glob(f"{escape(temp.name)}.*-*.part"))
+
+    def __delete_files(self, files) -> None:
+        for file in files:
+            self.manager.delete(file)
+
+    async def __hash_file(self, file: Path, hasher) -> None:
+        async with open(file, "rb") as f:
+            while chunk := await f.read(self.chunk):
+                hasher.update(chunk)
+
+    async def __save_file(self, hasher, temp: Path, real: Path, mtime: int) -> None:
+        if not hasher:
+            self.manager.move(temp, real, mtime, self.write_mtime)
+            return
+        digest = hasher.hexdigest()
+        # 同一摘要的查询、保存与记录依次执行，避免内容相同的文件同时下载完成时均被完整保存
+        async with self.__digest_lock(digest):
+            if await self.__link_duplicate(digest, temp, real):
+                return
+            self.manager.move(temp, real, mtime, self.write_mtime)
+            await self.recorder.add(digest, str(real))
+
+    @asynccontextmanager
+    async def __digest_lock(self, digest: str):
+        entry = self.digest_locks.setdefault(digest, [Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if not entry[1]:
+                del self.digest_locks[digest]
+
+    async def __link_duplicate(self, digest: str, temp: Path, real: Path) -> bool:
+        """内容已下载过时使用硬链接指向已有文件，返回 False 时需要保存临时文件"""
+        # 硬链接与已有文件共用同一 inode，不写入修改时间，避免改变已有文件的修改时间
+        if (row := await self.recorder.select(digest)) and (
+            source := Path(row[0])
+        ) != real:
+            with suppress(OSError):
+                if source.stat().st_size == temp.stat().st_size:
+                    link(source, real)
+                    self.manager.delete(temp)
+                    logging(
+                        self.print,
+                        _("文件 {0} 与已下载文件 {1} 内容相同，已创建硬链接").format(
+                            real.name, source
+                        ),
+                    )
+                    return True
+        return False
+
+    async def deduplicate(
+        self,
+        folder: Path,
+        exclude: list[Path] = (),
+    ) -> tuple[int, int]:
+        """将文件夹内内容相同的文件替换为硬链接，返回替换的文件数量和释放的字节数"""
+        count = size = 0
+        exclude = {
+            i.with_name(f"{i.name}{j}")
+            for i in exclude
+            for j in ("", "-wal", "-shm", "-journal")
+        }
+        for root, __, files in await to_thread(lambda: list(walk(folder))):
+            for name in files:
+                file = Path(root, name)
+                if (
+                    file.suffix in self.DATABASE_SUFFIXES
+                    or file in exclude
+                    or not file.is_file()
+                ):
+                    continue
+                digest = await to_thread(self.__digest_file, file)
+                if not (row := await self.recorder.select(digest)):
+                    await self.recorder.add(digest, str(file))
+                    continue
+                source = Path(row[0])
+                try:
+                    if source.samefile(file):
+                        continue
+                    if (length := file.stat().st_size) != source.stat().st_size:
+                        raise OSError
+                    # 先创建硬链接再替换，避免中断时丢失文件
+                    link(source, cache := file.with_name(f"{name}.dedup"))
+                except OSError:
+                    await self.recorder.add(digest, str(file))
+                    continue
+                try:
+                    replace(cache, file)
+                except OSError:
+                    self.manager.delete(cache)
+                    continue
+                count += 1
+                size += length
                 logging(
                     self.print,
-                    str(error),
-                    ERROR,
+                    _("文件 {0} 与 {1} 内容相同，已替换为硬链接").format(file, source),
                 )
-                return False
+        return count, size
+
+    @staticmethod
+    def __digest_file(file: Path) -> str:
+        with file.open("rb") as f:
+            return file_digest(f, "sha256").hexdigest()
+
+    @staticmethod
+    def __is_congestion(error: HTTPError) -> bool:
+        if isinstance(error, HTTPStatusError):
+            return (
+                error.response.status_code == 429 or error.response.status_code >= 500
+            )
+        # 等待连接池空闲连接超时与下载服务器无关
+        return isinstance(error, TransportError) and not isinstance(error, PoolTimeout)
 
     @staticmethod
     def __create_progress(
@@ -290,7 +688,6 @@ class Download:
         headers: dict[str, str],
         suffix: str,
     ) -> tuple[int, str]:
-        """未使用"""
         response = await self.client.head(
             url,
             headers=headers,
@@ -319,10 +716,12 @@ class Download:
         path: Path,
         name: str,
         default_suffix: str,
+        file_start: bytes = None,
     ) -> Path:
         try:
-            async with open(temp, "rb") as f:
-                file_start = await f.read(FILE_SIGNATURES_LENGTH)
+            if file_start is None:
+                async with open(temp, "rb") as f:
+                    file_start = await f.read(FILE_SIGNATURES_LENGTH)
             for offset, signature, suffix in FILE_SIGNATURES:
                 if file_start[offset : offset + len(signature)] == signature:
                     return path.joinpath(f"{name}.{suffix}")
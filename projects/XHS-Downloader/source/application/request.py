@@ -1,27 +1,36 @@
 from typing import TYPE_CHECKING
 
-from httpx import HTTPError
-from httpx import get
+from httpx import HTTPError, HTTPStatusError, Response
 
-from ..module import ERROR, Manager, logging, retry, sleep_time
+from ..module import ERROR, Manager, logging, retry
 from ..translation import _
 
 if TYPE_CHECKING:
+    from httpx import AsyncClient
+
     from ..module import Manager
+    from ..module.scheduler import RateLimiter
+    from ..module.session import Session
 
 __all__ = ["Html"]
 
 
 class Html:
+    # 由代理服务器返回的错误状态码，用于计算代理健康分数
+    PROXY_ERRORS = {407, 502, 503, 504}
+
     def __init__(
         self,
         manager: "Manager",
     ):
         self.print = manager.print
         self.retry = manager.retry
+        self.retry_policy = manager.retry_policy
         self.client = manager.request_client
         self.headers = manager.headers
         self.timeout = manager.timeout
+        self.limiter = manager.limiter
+        self.pool = manager.proxy_pool
 
     @retry
     async def request_url(
@@ -30,6 +39,7 @@ class Html:
         content=True,
         cookie: str = None,
         proxy: str = None,
+        session: "Session" = None,
         **kwargs,
     ) -> str:
         if not url.startswith("http"):
@@ -37,15 +47,23 @@ class Html:
         headers = self.update_cookie(
             cookie,
         )
+        if session:
+            client, limiter = session.client, session.limiter
+        else:
+            client, limiter = self.client, self.limiter
+            proxy = proxy or self.pool.select()
+        # 仅解析重定向时不消耗令牌，服务器要求退避时仍需等待
+        await limiter.acquire(url, content)
         try:
             match bool(proxy):
                 case False:
                     response = await self.__request_url_get(
+                        client,
                         url,
                         headers,
                         **kwargs,
                     )
-                    await sleep_time()
+                    self.__feedback(limiter, url, response)
                     response.raise_for_status()
                     return response.text if content else str(response.url)
                 case True:
@@ -55,12 +73,18 @@ class Html:
                         proxy,
                         **kwargs,
                     )
-                    await sleep_time()
+                    self.__feedback(limiter, url, response)
+                    self.pool.feedback(
+                        proxy, response.status_code not in self.PROXY_ERRORS
+                    )
                     response.raise_for_status()
                     return response.text if content else str(response.url)
                 case _:
                     raise ValueError
         except HTTPError as error:
+            if proxy and not isinstance(error, HTTPStatusError):
+                self.pool.feedback(proxy, False)
+            self.retry_policy.record(error)
             logging(
                 self.print,
                 _("网络异常，{0} 请求失败: {1}").format(url, repr(error)),
@@ -68,15 +92,24 @@ class Html:
             )
             return ""
 
+    @staticmethod
+    def __feedback(limiter: "RateLimiter", url: str, response: Response) -> None:
+        limiter.feedback(
+            url,
+            response.status_code,
+            response.headers.get("Retry-After"),
+        )
+
     @staticmethod
     def format_url(url: str) -> str:
         return bytes(url, "utf-8").decode("unicode_escape")
 
+    @staticmethod
     def update_cookie(
-        self,
         cookie: str = None,
-    ) -> dict:
-        return self.headers | {"Cookie": cookie} if cookie else self.headers.copy()
+    ) -> dict | None:
+        # 客户端已设置默认请求头，仅传递需要覆盖的 Cookie
+        return {"Cookie": cookie} if cookie else None
 
     async def __request_url_head(
         self,
@@ -97,23 +130,21 @@ class Html:
         proxy: str,
         **kwargs,
     ):
-        return await self.client.head(
-            url,
-            headers=headers,
-            proxy=proxy,
-            follow_redirects=True,
-            verify=False,
-            timeout=self.timeout,
-            **kwargs,
-        )
+        async with self.pool.lease(proxy) as client:
+            return await client.head(
+                url,
+                headers=headers,
+                **kwargs,
+            )
 
     async def __request_url_get(
         self,
+        client: "AsyncClient",
         url: str,
         headers: dict,
         **kwargs,
     ):
-        return await self.client.get(
+        return await client.get(
             url,
             headers=headers,
             **kwargs,
@@ -126,12 +157,9 @@ class Html:
         proxy: str,
         **kwargs,
     ):
-        return get(
-            url,
-            headers=headers,
-            proxy=proxy,
-            follow_redirects=True,
-            verify=False,
-            timeout=self.timeout,
-            **kwargs,
-        )
+        async with self.pool.lease(proxy) as client:
+            return await client.get(
+                url,
+                headers=headers,
+                **kwargs,
+            )
@@ -1,7 +1,9 @@
+from .bloom import BloomFilter
 from .browser import BrowserCookie
 from .cleaner import Cleaner
 from .converter import Converter
 from .error import CacheError
+from .error import SegmentError
 from .file_folder import file_switch
 from .file_folder import remove_empty_directories
 from .namespace import Namespace
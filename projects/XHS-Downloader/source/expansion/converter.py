@@ -1,13 +1,31 @@
+from collections import Counter
+from json import JSONDecoder
+from re import compile
 from typing import Union
 
 from lxml.etree import HTML
 from yaml import safe_load
 
+try:
+    from orjson import loads
+except ImportError:
+    from json import loads
+
 __all__ = ["Converter"]
 
 
 class Converter:
     INITIAL_STATE = "//script/text()"
+    INITIAL_STATE_PREFIX = "window.__INITIAL_STATE__="
+    INITIAL_STATE_MARKER = "window.__INITIAL_STATE__"
+    SCRIPT_START = "<script"
+    SCRIPT_END = "</script>"
+    # 定位初始数据的方式统计：fast 为直接扫描原始文本，fallback 为构建 DOM 解析
+    statistics = Counter()
+    NOTE_DETAIL = '"noteDetailMap":'
+    # 先整体匹配字符串字面量使其原样保留，仅替换处于值位置的 JavaScript 独有字面量 undefined
+    UNDEFINED = compile(r'("(?:\\.|[^"\\])*")|(?<=[:,\[])undefined(?=[,\]}])')
+    DECODER = JSONDecoder()
     KEYS_LINK = (
         "note",
         "noteDetailMap",
@@ -21,13 +39,59 @@ class Converter:
     def _extract_object(self, html: str) -> str:
         if not html:
             return ""
+        if script := self._locate_script(html):
+            self.statistics["fast"] += 1
+            return script
+        self.statistics["fallback"] += 1
         html_tree = HTML(html)
         scripts = html_tree.xpath(self.INITIAL_STATE)
         return self.get_script(scripts)
 
+    @classmethod
+    def _locate_script(cls, html: str) -> str:
+        """从后向前扫描原始文本，截取以初始数据标记开头的 script 内容"""
+        end = len(html)
+        while (start := html.rfind(cls.INITIAL_STATE_MARKER, 0, end)) != -1:
+            end = start
+            tag = html.rfind("<", 0, start)
+            if (
+                html.startswith(cls.SCRIPT_START, tag)
+                and html.find(">", tag) == start - 1
+            ):
+                if (close := html.find(cls.SCRIPT_END, start)) == -1:
+                    return ""
+                return html[start:close]
+        return ""
+
+    @classmethod
+    def _convert_object(cls, text: str) -> dict:
+        text = text.removeprefix(cls.INITIAL_STATE_PREFIX)
+        try:
+            return cls._decode_json(text)
+        except ValueError:
+            return safe_load(text)
+
+    @classmethod
+    def _decode_json(cls, text: str) -> dict:
+        if (start := text.find(cls.NOTE_DETAIL)) != -1:
+            try:
+                value, __ = cls.DECODER.raw_decode(
+                    cls.normalize(text[start + len(cls.NOTE_DETAIL) :])
+                )
+                return {"note": {"noteDetailMap": value}}
+            except ValueError:
+                pass
+        return loads(cls.normalize(text))
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        if "undefined" not in text:
+            return text
+        return cls.UNDEFINED.sub(cls.__replace_undefined, text)
+
     @staticmethod
-    def _convert_object(text: str) -> dict:
-        return safe_load(text.lstrip("window.__INITIAL_STATE__="))
+    def __replace_undefined(match) -> str:
+        return match.group(1) or "null"
 
     @classmethod
     def _filter_object(cls, data: dict) -> dict:
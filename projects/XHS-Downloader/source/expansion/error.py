@@ -5,3 +5,12 @@ class CacheError(Exception):
 
     def __str__(self):
         return self.message
+
+
+class SegmentError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+    def __str__(self):
+        return self.message
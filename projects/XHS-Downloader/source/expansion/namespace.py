@@ -1,65 +1,77 @@
-from copy import deepcopy
-from types import SimpleNamespace
+from functools import lru_cache
 from typing import Union
 
 __all__ = ["Namespace"]
 
 
 class Namespace:
+    INVALID = object()
+
     def __init__(self, data: dict) -> None:
-        self.data: SimpleNamespace = self.generate_data_object(data)
+        self.data: dict = self.generate_data_object(data)
 
     @staticmethod
-    def generate_data_object(data: dict) -> SimpleNamespace:
-        def depth_conversion(element):
-            if isinstance(element, dict):
-                return SimpleNamespace(
-                    **{k: depth_conversion(v) for k, v in element.items()}
-                )
-            elif isinstance(element, list):
-                return [depth_conversion(item) for item in element]
-            else:
-                return element
-
-        return depth_conversion(data)
+    def generate_data_object(data: dict) -> dict:
+        # 直接持有解析结果，读取时不复制、不转换
+        return data if isinstance(data, dict) else {}
 
     def safe_extract(
         self,
         attribute_chain: str,
-        default: Union[str, int, list, dict, SimpleNamespace] = "",
+        default: Union[str, int, list, dict] = "",
     ):
         return self.__safe_extract(self.data, attribute_chain, default)
 
     @staticmethod
+    @lru_cache(maxsize=256)
+    def compile_chain(attribute_chain: str) -> tuple:
+        """将属性链编译为 (键, 索引) 元组，相同属性链仅解析一次"""
+        steps = []
+        for attribute in attribute_chain.split("."):
+            if "[" in attribute:
+                attribute, index = attribute.split("[", 1)
+                try:
+                    index = int(index[:-1])
+                except ValueError:
+                    index = Namespace.INVALID
+                steps.append((attribute, index))
+            else:
+                steps.append((attribute, None))
+        return tuple(steps)
+
+    @classmethod
     def __safe_extract(
-        data_object: SimpleNamespace,
+        cls,
+        data_object: dict,
         attribute_chain: str,
-        default: Union[str, int, list, dict, SimpleNamespace] = "",
+        default: Union[str, int, list, dict] = "",
     ):
-        data = deepcopy(data_object)
-        attributes = attribute_chain.split(".")
-        for attribute in attributes:
-            if "[" in attribute:
-                parts = attribute.split("[", 1)
-                attribute = parts[0]
-                index = parts[1][:-1]
-                try:
-                    index = int(index)
-                    data = getattr(data, attribute, None)[index]
-                except (IndexError, TypeError, ValueError):
+        data = data_object
+        for attribute, index in cls.compile_chain(attribute_chain):
+            data = data.get(attribute) if isinstance(data, dict) else None
+            if index is None:
+                if not cls.__exists(data):
                     return default
+            elif index is cls.INVALID:
+                return default
             else:
-                data = getattr(data, attribute, None)
-                if not data:
+                try:
+                    data = data[index]
+                except (IndexError, KeyError, TypeError):
                     return default
-        return data or default
+        return data if cls.__exists(data) else default
+
+    @staticmethod
+    def __exists(data) -> bool:
+        # 与对象形式保持一致：空字典视为存在
+        return bool(data) or isinstance(data, dict)
 
     @classmethod
     def object_extract(
         cls,
-        data_object: SimpleNamespace,
+        data_object: dict,
         attribute_chain: str,
-        default: Union[str, int, list, dict, SimpleNamespace] = "",
+        default: Union[str, int, list, dict] = "",
     ):
         return cls.__safe_extract(
             data_object,
@@ -73,12 +85,7 @@ class Namespace:
 
     @classmethod
     def convert_to_dict(cls, data) -> dict:
-        return {
-            key: cls.convert_to_dict(value)
-            if isinstance(value, SimpleNamespace)
-            else value
-            for key, value in vars(data).items()
-        }
+        return data if isinstance(data, dict) else {}
 
     def __bool__(self):
-        return bool(vars(self.data))
+        return bool(self.data)
@@ -1,13 +1,25 @@
 from .extend import Account
 from .manager import Manager
 from .model import (
+    ExtractBatchItem,
+    ExtractBatchParams,
     ExtractData,
     ExtractParams,
 )
 from .recorder import DataRecorder
+from .recorder import HashRecorder
+from .recorder import LinkRecorder
 from .recorder import IDRecorder
+from .recorder import JobRecorder
 from .recorder import MapRecorder
 from .mapping import Mapping
+from .scheduler import DownloadScheduler
+from .scheduler import RateLimiter
+from .cache import DetailCache
+from .flight import SingleFlight
+from .metrics import Metrics
+from .proxy import ProxyPool
+from .session import SessionPool
 from .settings import Settings
 from .static import (
     VERSION_MAJOR,
@@ -34,6 +46,7 @@ from .static import (
     __VERSION__,
 )
 from .tools import (
+    RetryPolicy,
     retry,
     logging,
     sleep_time,
@@ -0,0 +1,89 @@
+from collections import Counter, OrderedDict
+from copy import deepcopy
+from hashlib import sha256
+from json import dump, load
+from pathlib import Path
+from time import time
+
+__all__ = ["DetailCache"]
+
+
+class DetailCache:
+    """作品数据缓存，按作品 ID 与请求参数缓存提取后的作品数据，超出数量时淘汰最久未使用的数据"""
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: int,
+        file: Path = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.file = file
+        self.data: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self.statistics = Counter()
+
+    def __bool__(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    @staticmethod
+    def key(id_: str, cookie: str = None) -> str:
+        # 不同 Cookie 获取的数据可能不同，仅保存 Cookie 摘要
+        if not cookie:
+            return id_
+        return f"{id_}:{sha256(cookie.encode()).hexdigest()[:16]}"
+
+    def get(self, key: str) -> dict | None:
+        if not (item := self.data.get(key)):
+            self.statistics["miss"] += 1
+            return None
+        if item[0] < time():
+            del self.data[key]
+            self.statistics["expired"] += 1
+            self.statistics["miss"] += 1
+            return None
+        self.data.move_to_end(key)
+        self.statistics["hit"] += 1
+        return deepcopy(item[1])
+
+    def set(self, key: str, data: dict) -> None:
+        self.data[key] = (time() + self.ttl, deepcopy(data))
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.statistics["evicted"] += 1
+
+    def load(self) -> None:
+        if not self.file or not self.file.is_file():
+            return
+        try:
+            with self.file.open("r", encoding="utf-8") as f:
+                items = load(f)
+        except (OSError, ValueError):
+            return
+        now = time()
+        for key, expires, data in items[-self.maxsize :]:
+            if expires > now:
+                self.data[key] = (expires, data)
+
+    def save(self) -> None:
+        if not self.file:
+            return
+        now = time()
+        with self.file.open("w", encoding="utf-8") as f:
+            dump(
+                [[k, v[0], v[1]] for k, v in self.data.items() if v[0] > now],
+                f,
+                ensure_ascii=False,
+            )
+
+    def report(self) -> dict:
+        total = self.statistics["hit"] + self.statistics["miss"]
+        return {
+            "size": len(self.data),
+            "hit": self.statistics["hit"],
+            "miss": self.statistics["miss"],
+            "expired": self.statistics["expired"],
+            "evicted": self.statistics["evicted"],
+            "hit_rate": round(self.statistics["hit"] / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,33 @@
+from asyncio import Task, create_task, shield
+from collections import Counter
+from typing import Awaitable, Callable, Hashable
+
+__all__ = ["SingleFlight"]
+
+
+class SingleFlight:
+    """合并相同键的并发调用，执行期间的重复调用等待同一任务并共享结果"""
+
+    def __init__(self):
+        self.calls: dict[Hashable, Task] = {}
+        self.statistics = Counter()
+
+    async def run(
+        self,
+        key: Hashable,
+        function: Callable[..., Awaitable],
+        *args,
+        **kwargs,
+    ):
+        if task := self.calls.get(key):
+            self.statistics["shared"] += 1
+        else:
+            self.statistics["started"] += 1
+            task = self.calls[key] = create_task(function(*args, **kwargs))
+            task.add_done_callback(lambda __: self.__release(key, task))
+        # 单个调用方被取消时不影响其他等待同一任务的调用方
+        return await shield(task)
+
+    def __release(self, key: Hashable, task: Task) -> None:
+        if self.calls.get(key) is task:
+            del self.calls[key]
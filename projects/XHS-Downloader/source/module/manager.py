@@ -1,12 +1,20 @@
+from asyncio import gather
+from contextlib import suppress
+from errno import EXDEV
+from importlib.util import find_spec
 from pathlib import Path
 from re import compile, sub
 from shutil import move, rmtree
-from os import utime
+from time import time
+from os import replace, utime
 from httpx import (
     AsyncClient,
     AsyncHTTPTransport,
+    HTTPError,
     HTTPStatusError,
+    Limits,
     RequestError,
+    Timeout,
     TimeoutException,
     get,
 )
@@ -14,8 +22,13 @@ from httpx import (
 from source.expansion import remove_empty_directories
 
 from ..translation import _
+from .cache import DetailCache
+from .metrics import Metrics
+from .proxy import ProxyPool
+from .session import SessionPool
+from .scheduler import DownloadScheduler, RateLimiter
 from .static import HEADERS, USERAGENT, WARNING
-from .tools import logging
+from .tools import RetryPolicy, logging
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -47,6 +60,20 @@ class Manager:
     }
     SEPARATE = "_"
     WEB_ID = r"(?:^|; )webId=[^;]+"
+    # 启动时预先建立连接的下载服务器
+    CDN_HOSTS = (
+        "sns-img-bd.xhscdn.com",
+        "ci.xiaohongshu.com",
+        "sns-video-bd.xhscdn.com",
+    )
+    KEEPALIVE_EXPIRY = 30
+    # 同时解析的短链接数量
+    SHORT_CONCURRENCY = 8
+    # 未限制并发的请求预留的连接数量，例如检查新版本
+    REQUEST_SPARE = 2
+    TEMP = ".XHS-Downloader-Temp"
+    # 缓存文件保留时间，单位：秒
+    TEMP_EXPIRY = 24 * 3600
     WEB_SESSION = r"(?:^|; )web_session=[^;]+"
 
     def __init__(
@@ -71,15 +98,30 @@ class Manager:
         author_archive: bool,
         write_mtime: bool,
         script_server: bool,
+        note_concurrency: int,
+        max_workers: int,
+        max_bandwidth: int,
+        video_segments: int,
+        file_dedup: bool,
+        cache_ttl: int,
+        cache_size: int,
+        cache_persist: bool,
+        request_rate: float,
+        request_burst: int,
+        cookie_pool: list[str],
+        http2: bool,
+        monitor_workers: int,
+        script_workers: int,
+        download_journal: bool,
         cleaner: "Cleaner",
         print_object,
     ):
         self.print = print_object
         self.root = root
         self.cleaner = cleaner
-        self.temp = root.joinpath("Temp")
         self.path = self.__check_path(path)
         self.folder = self.__check_folder(folder)
+        self.temp = self.__check_temp(root.joinpath("Temp"))
         self.compatible()
         self.blank_headers = HEADERS | {
             "user-agent": user_agent or USERAGENT,
@@ -88,6 +130,8 @@ class Manager:
             "cookie": cookie,
         }
         self.retry = retry
+        self.retry_policy = RetryPolicy(retry)
+        self.metrics = Metrics()
         self.chunk = chunk
         self.name_format = self.__check_name_format(name_format)
         self.record_data = self.check_bool(record_data, False)
@@ -95,9 +139,20 @@ class Manager:
         self.folder_mode = self.check_bool(folder_mode, False)
         self.download_record = self.check_bool(download_record, True)
         self.proxy_tip = None
-        self.proxy = self.__check_proxy(proxy)
-        self.print_proxy_tip()
+        if isinstance(proxy, list | tuple):
+            # 代理池模式：基础客户端使用第一个测试成功的代理
+            scores = self.__check_proxies(proxy)
+            self.proxy = next((k for k, v in scores.items() if v), None)
+        else:
+            scores = {}
+            self.proxy = self.__check_proxy(proxy)
+            self.print_proxy_tip()
         self.timeout = timeout
+        self.http2 = self.__check_http2(http2)
+        self.note_concurrency = self.check_int(note_concurrency, 3)
+        self.video_segments = self.check_int(video_segments, 4)
+        max_workers = self.check_int(max_workers, 8)
+        # 请求连接池大小为共用该客户端的各类请求并发上限之和，避免等待连接超时
         self.request_client = AsyncClient(
             headers=self.headers
             | {
@@ -106,20 +161,24 @@ class Manager:
             timeout=timeout,
             verify=False,
             follow_redirects=True,
-            mounts={
-                "http://": AsyncHTTPTransport(proxy=self.proxy),
-                "https://": AsyncHTTPTransport(proxy=self.proxy),
-            },
+            mounts=self.__create_mounts(
+                self.note_concurrency + self.SHORT_CONCURRENCY + self.REQUEST_SPARE
+            ),
         )
+        # 调度器按下载服务器分别限制并发连接，连接池大小按常用下载服务器数量设置；
+        # 下载服务器较多时等待空闲连接不计入超时，避免被误判为服务器拥塞
         self.download_client = AsyncClient(
             headers=self.blank_headers,
-            timeout=timeout,
+            timeout=Timeout(timeout, pool=None),
             verify=False,
             follow_redirects=True,
-            mounts={
-                "http://": AsyncHTTPTransport(proxy=self.proxy),
-                "https://": AsyncHTTPTransport(proxy=self.proxy),
-            },
+            mounts=self.__create_mounts(max_workers * len(self.CDN_HOSTS)),
+        )
+        self.proxy_pool = ProxyPool(
+            self.request_client.headers,
+            timeout,
+            scores,
+            self.http2,
         )
         self.image_download = self.check_bool(image_download, True)
         self.video_download = self.check_bool(video_download, True)
@@ -127,8 +186,74 @@ class Manager:
         self.author_archive = self.check_bool(author_archive, False)
         self.write_mtime = self.check_bool(write_mtime, False)
         self.script_server = self.check_bool(script_server, False)
+        self.scheduler = DownloadScheduler(
+            max_workers,
+            self.check_int(max_bandwidth, 0, 0),
+        )
+        self.file_dedup = self.check_bool(file_dedup, False)
+        self.monitor_workers = self.check_int(monitor_workers, 3)
+        self.script_workers = self.check_int(script_workers, 3)
+        self.download_journal = self.check_bool(download_journal, True)
+        self.detail_cache = DetailCache(
+            self.check_int(cache_size, 1024),
+            self.check_int(cache_ttl, 300, 0),
+            root.joinpath("DetailCache.json")
+            if self.check_bool(cache_persist, False)
+            else None,
+        )
+        self.limiter = RateLimiter(
+            self.check_float(request_rate, 0.5),
+            self.check_int(request_burst, 2),
+        )
+        self.session_pool = SessionPool(
+            self.__check_cookie_pool(cookie_pool),
+            self.blank_headers
+            | {
+                "referer": "https://www.xiaohongshu.com/",
+            },
+            timeout,
+            self.proxy,
+            self.limiter.rate,
+            self.limiter.burst,
+            self.http2,
+        )
         self.create_folder()
 
+    def __create_mounts(self, connections: int) -> dict[str, AsyncHTTPTransport]:
+        limits = Limits(
+            max_connections=connections,
+            max_keepalive_connections=connections,
+            keepalive_expiry=self.KEEPALIVE_EXPIRY,
+        )
+        return {
+            "http://": AsyncHTTPTransport(proxy=self.proxy, limits=limits),
+            "https://": AsyncHTTPTransport(
+                proxy=self.proxy,
+                http2=self.http2,
+                limits=limits,
+            ),
+        }
+
+    def __check_http2(self, http2: bool) -> bool:
+        if not self.check_bool(http2, False):
+            return False
+        if find_spec("h2") is None:
+            logging(
+                self.print,
+                _("未安装 h2 模块，无法启用 HTTP/2，请运行 pip install h2 安装"),
+                WARNING,
+            )
+            return False
+        return True
+
+    async def warm_up(self) -> None:
+        """预先解析下载服务器域名并建立连接，减少首个文件的连接耗时"""
+        await gather(*(self.__warm_up(f"https://{i}/") for i in self.CDN_HOSTS))
+
+    async def __warm_up(self, url: str) -> None:
+        with suppress(HTTPError):
+            await self.download_client.head(url, timeout=5)
+
     def __check_path(self, path: str) -> Path:
         if not path:
             return self.root
@@ -136,6 +261,15 @@ class Manager:
             return r
         return r if (r := self.__check_root_again(r)) else self.root
 
+    def __check_temp(self, temp: Path) -> Path:
+        # 缓存文件夹与下载文件夹位于不同磁盘时，移动文件需要复制数据，改为在下载文件夹所在磁盘缓存
+        try:
+            if self.root.stat().st_dev == self.path.stat().st_dev:
+                return temp
+        except OSError:
+            return temp
+        return self.path.joinpath(self.TEMP)
+
     def __check_folder(self, folder: str) -> Path:
         folder = self.cleaner.filter_name(folder, default="Download")
         return self.path.joinpath(folder)
@@ -181,7 +315,13 @@ class Manager:
         mtime: int = None,
         rewrite: bool = False,
     ):
-        move(temp.resolve(), path.resolve())
+        try:
+            # 同一磁盘内重命名为原子操作，目标文件不会出现不完整的内容
+            replace(temp.resolve(), path.resolve())
+        except OSError as error:
+            if error.errno != EXDEV:
+                raise
+            move(temp.resolve(), path.resolve())
         if rewrite and mtime:
             cls.update_mtime(path.resolve(), mtime)
 
@@ -192,6 +332,23 @@ class Manager:
     def __clean(self):
         rmtree(self.temp.resolve())
 
+    def clean_temp(self, keep: set[str]) -> int:
+        """删除不在 keep 中且超过保留时间的缓存文件，返回删除的文件数量"""
+        expired = time() - self.TEMP_EXPIRY
+        count = 0
+        for file in self.temp.iterdir():
+            # 视频分段缓存文件按所属的缓存文件判断是否保留
+            name = file.name.rsplit(".", 2)[0] if file.suffix == ".part" else file.name
+            with suppress(OSError):
+                if (
+                    name not in keep
+                    and file.is_file()
+                    and file.stat().st_mtime < expired
+                ):
+                    file.unlink()
+                    count += 1
+        return count
+
     def filter_name(self, name: str) -> str:
         name = self.NAME.sub("_", name)
         return sub(r"_+", "_", name).strip("_")
@@ -200,9 +357,23 @@ class Manager:
     def check_bool(value: bool, default: bool) -> bool:
         return value if isinstance(value, bool) else default
 
+    @staticmethod
+    def check_int(value: int, default: int, minimum: int = 1) -> int:
+        if isinstance(value, bool) or not isinstance(value, int):
+            return default
+        return max(value, minimum)
+
+    @staticmethod
+    def check_float(value: float, default: float, minimum: float = 0) -> float:
+        if isinstance(value, bool) or not isinstance(value, int | float):
+            return default
+        return max(value, minimum)
+
     async def close(self):
         await self.request_client.aclose()
         await self.download_client.aclose()
+        await self.proxy_pool.close()
+        await self.session_pool.close()
         # self.__clean()
         remove_empty_directories(self.root)
         remove_empty_directories(self.folder)
@@ -250,6 +421,19 @@ class Manager:
                 )
         return None
 
+    @staticmethod
+    def __check_cookie_pool(cookies: list[str]) -> list[str]:
+        if not isinstance(cookies, list | tuple):
+            return []
+        return [i.strip() for i in cookies if isinstance(i, str) and i.strip()]
+
+    def __check_proxies(self, proxies: list | tuple) -> dict[str, float]:
+        scores = {}
+        for proxy in proxies:
+            scores[proxy] = 1.0 if self.__check_proxy(proxy) else 0.0
+            self.print_proxy_tip()
+        return scores
+
     def print_proxy_tip(
         self,
     ) -> None:
@@ -281,6 +465,17 @@ class Manager:
     ):
         self.folder.mkdir(exist_ok=True)
         self.temp.mkdir(exist_ok=True)
+        self.__migrate_temp(self.root.joinpath("Temp"))
+
+    def __migrate_temp(self, old: Path) -> None:
+        """缓存文件夹位置改变后，将原缓存文件夹内的缓存文件移动至新位置，继续下载时仍可从断点处开始"""
+        if old == self.temp or not old.is_dir():
+            return
+        for file in old.iterdir():
+            target = self.temp.joinpath(file.name)
+            with suppress(OSError):
+                if file.is_file() and not target.exists():
+                    self.move(file, target)
 
     def compatible(
         self,
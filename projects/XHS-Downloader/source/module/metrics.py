@@ -0,0 +1,63 @@
+from asyncio import Semaphore
+from collections import Counter
+from contextlib import asynccontextmanager, contextmanager
+from time import perf_counter
+
+__all__ = ["Metrics"]
+
+
+class Stage:
+    __slots__ = ("count", "total", "maximum")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+
+class Metrics:
+    """各处理阶段的耗时与计数统计，仅记录累计值，开销可忽略"""
+
+    def __init__(self):
+        self.stages: dict[str, Stage] = {}
+        self.counters = Counter()
+
+    def record(self, stage: str, elapsed: float) -> None:
+        if not (item := self.stages.get(stage)):
+            item = self.stages[stage] = Stage()
+        item.count += 1
+        item.total += elapsed
+        item.maximum = max(item.maximum, elapsed)
+
+    def count(self, name: str, value: int = 1) -> None:
+        self.counters[name] += value
+
+    @contextmanager
+    def timer(self, stage: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, perf_counter() - start)
+
+    @asynccontextmanager
+    async def acquire(self, stage: str, semaphore: Semaphore):
+        """记录等待并发许可的时间"""
+        start = perf_counter()
+        async with semaphore:
+            self.record(stage, perf_counter() - start)
+            yield
+
+    def report(self) -> dict:
+        return {
+            "stages": {
+                k: {
+                    "count": v.count,
+                    "total": round(v.total, 4),
+                    "average": round(v.total / v.count, 4) if v.count else 0.0,
+                    "max": round(v.maximum, 4),
+                }
+                for k, v in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
@@ -8,9 +8,27 @@ class ExtractParams(BaseModel):
     cookie: str = None
     proxy: str = None
     skip: bool = False
+    bypass_cache: bool = False
 
 
 class ExtractData(BaseModel):
     message: str
     params: ExtractParams
     data: dict | None
+
+
+class ExtractBatchParams(BaseModel):
+    urls: list[str]
+    download: bool = False
+    index: list[str | int] | None = None
+    cookie: str = None
+    proxy: str = None
+    skip: bool = False
+    bypass_cache: bool = False
+
+
+class ExtractBatchItem(BaseModel):
+    index: int
+    url: str
+    message: str
+    data: dict | None
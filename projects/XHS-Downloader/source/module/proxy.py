@@ -0,0 +1,98 @@
+from collections import Counter, OrderedDict
+from contextlib import asynccontextmanager
+from random import choices
+
+from httpx import AsyncClient, Limits
+
+__all__ = ["ProxyPool"]
+
+
+class ProxyPool:
+    """按代理地址复用的异步客户端池，配置多个代理时按健康分数轮换使用"""
+
+    CLIENTS = 16
+    SCORE_MIN = 0.05
+    SCORE_DECAY = 0.8
+
+    def __init__(
+        self,
+        headers: dict,
+        timeout: int,
+        scores: dict[str, float] = None,
+        http2: bool = False,
+    ):
+        self.headers = headers
+        self.timeout = timeout
+        self.http2 = http2
+        # 全部代理测试失败时不启用代理池，与单个代理测试失败时相同，直接连接
+        self.scores = (
+            {k: max(v, self.SCORE_MIN) for k, v in scores.items()}
+            if scores and any(scores.values())
+            else {}
+        )
+        self.clients: OrderedDict[str, AsyncClient] = OrderedDict()
+        # 客户端正在处理的请求数量，被淘汰的客户端在请求全部结束后关闭
+        self.leases: Counter[AsyncClient] = Counter()
+        self.evicted: set[AsyncClient] = set()
+
+    def __bool__(self):
+        return bool(self.scores)
+
+    @asynccontextmanager
+    async def lease(self, proxy: str):
+        """获取代理对应的客户端，使用期间不会被关闭"""
+        client = await self.client(proxy)
+        self.leases[client] += 1
+        try:
+            yield client
+        finally:
+            self.leases[client] -= 1
+            if self.leases[client] <= 0:
+                del self.leases[client]
+                if client in self.evicted:
+                    self.evicted.discard(client)
+                    await client.aclose()
+
+    async def client(self, proxy: str) -> AsyncClient:
+        if client := self.clients.get(proxy):
+            self.clients.move_to_end(proxy)
+            return client
+        client = self.clients[proxy] = AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            verify=False,
+            follow_redirects=True,
+            proxy=proxy,
+            http2=self.http2,
+            limits=Limits(max_keepalive_connections=10, keepalive_expiry=30),
+        )
+        if len(self.clients) > self.CLIENTS:
+            __, expired = self.clients.popitem(last=False)
+            if self.leases[expired]:
+                self.evicted.add(expired)
+            else:
+                await expired.aclose()
+        return client
+
+    def select(self) -> str | None:
+        """按健康分数加权随机选择代理，未配置代理池时返回 None"""
+        if not self.scores:
+            return None
+        proxies = list(self.scores)
+        return choices(proxies, weights=[self.scores[i] for i in proxies])[0]
+
+    def feedback(self, proxy: str, success: bool) -> None:
+        if proxy not in self.scores:
+            return
+        score = self.scores[proxy] * self.SCORE_DECAY
+        self.scores[proxy] = max(
+            score + (1 - self.SCORE_DECAY) if success else score * 0.5,
+            self.SCORE_MIN,
+        )
+
+    async def close(self) -> None:
+        for client in (*self.clients.values(), *self.evicted):
+            await client.aclose()
+        self.clients.clear()
+        self.evicted.clear()
+        self.leases.clear()
@@ -1,16 +1,45 @@
-from asyncio import CancelledError
+from asyncio import CancelledError, Lock, create_task, sleep
+from collections import Counter
 from contextlib import suppress
 from typing import TYPE_CHECKING
 from shutil import move
+from time import time
 from aiosqlite import connect
 
+from ..expansion import BloomFilter
+from ..translation import _
+from .static import ERROR, WARNING
+from .tools import logging
+
 if TYPE_CHECKING:
     from ..module import Manager
 
-__all__ = ["IDRecorder", "DataRecorder", "MapRecorder"]
+__all__ = [
+    "IDRecorder",
+    "DataRecorder",
+    "MapRecorder",
+    "HashRecorder",
+    "LinkRecorder",
+    "JobRecorder",
+]
 
 
 class IDRecorder:
+    # 写入先进入队列，达到数量或间隔时间后在同一事务中批量提交
+    BATCH_SIZE = 64
+    FLUSH_INTERVAL = 1.0
+    # 批量提交连续失败达到该次数后改为逐条写入，并丢弃无法写入的记录
+    FLUSH_RETRIES = 3
+    PRAGMAS = (
+        "PRAGMA journal_mode=WAL;",
+        "PRAGMA synchronous=NORMAL;",
+        "PRAGMA temp_store=MEMORY;",
+        "PRAGMA busy_timeout=5000;",
+    )
+    MISSING = object()
+    # 下载记录数量超过该值时使用布隆过滤器代替集合，命中后再查询数据库确认
+    INDEX_LIMIT = 2_000_000
+
     def __init__(self, manager: "Manager"):
         self.name = "ExploreID.db"
         self.file = manager.root.joinpath(self.name)
@@ -18,6 +47,16 @@ class IDRecorder:
         self.switch = manager.download_record
         self.database = None
         self.cursor = None
+        self.pending: list[tuple[int, str, tuple]] = []
+        self.overlay: dict[str, tuple[int, tuple | None]] = {}
+        self.sequence = 0
+        self.flush_lock = Lock()
+        self.flush_task = None
+        self.flush_failures = 0
+        self.print = manager.print
+        self.index: set[str] | BloomFilter | None = None
+        self.statistics = Counter()
+        self.metrics = manager.metrics
 
     async def _connect_database(self):
         self.database = await connect(self.file)
@@ -27,10 +66,36 @@ class IDRecorder:
         )
         await self.database.commit()
 
+    async def _tune_database(self):
+        for pragma in self.PRAGMAS:
+            await self.database.execute(pragma)
+
+    async def _load_index(self):
+        (count,) = (
+            await self.database.execute_fetchall("SELECT COUNT(*) FROM explore_id")
+        )[0]
+        self.index = BloomFilter(count * 2) if count > self.INDEX_LIMIT else set()
+        async with self.database.execute("SELECT ID FROM explore_id") as cursor:
+            cursor.arraysize = 4096
+            while rows := await cursor.fetchmany():
+                for (id_,) in rows:
+                    self.index.add(id_)
+
     async def select(self, id_: str):
         if self.switch:
-            await self.cursor.execute("SELECT ID FROM explore_id WHERE ID=?", (id_,))
-            return await self.cursor.fetchone()
+            row = await self.__select(id_)
+            self.statistics["hit" if row else "miss"] += 1
+            return row
+
+    async def __select(self, id_: str):
+        if isinstance(self.index, set):
+            return (id_,) if id_ in self.index else None
+        if (row := self._read_overlay(id_)) is not self.MISSING:
+            return row
+        if self.index is not None and id_ not in self.index:
+            return None
+        self.statistics["database"] += 1
+        return await self._fetchone("SELECT ID FROM explore_id WHERE ID=?", (id_,))
 
     async def add(
         self,
@@ -40,13 +105,25 @@ class IDRecorder:
         **kwargs,
     ) -> None:
         if self.switch:
-            await self.database.execute("REPLACE INTO explore_id VALUES (?);", (id_,))
-            await self.database.commit()
+            if self.index is not None:
+                self.index.add(id_)
+            await self._write(
+                "REPLACE INTO explore_id VALUES (?);",
+                (id_,),
+                id_,
+                (id_,),
+            )
 
     async def __delete(self, id_: str) -> None:
         if id_:
-            await self.database.execute("DELETE FROM explore_id WHERE ID=?", (id_,))
-            await self.database.commit()
+            if isinstance(self.index, set):
+                self.index.discard(id_)
+            await self._write(
+                "DELETE FROM explore_id WHERE ID=?",
+                (id_,),
+                id_,
+                None,
+            )
 
     async def delete(self, ids: list[str]):
         if self.switch:
@@ -54,18 +131,141 @@ class IDRecorder:
 
     async def all(self):
         if self.switch:
+            await self.flush()
             await self.cursor.execute("SELECT ID FROM explore_id")
             return [i[0] for i in await self.cursor.fetchmany()]
 
+    async def _fetchone(self, sql: str, parameters: tuple):
+        # 每次查询使用独立游标，避免并发查询互相覆盖结果
+        async with self.database.execute(sql, parameters) as cursor:
+            return await cursor.fetchone()
+
+    def _read_overlay(self, key: str):
+        """读取尚未提交的写入，保证查询能读到自己的写入"""
+        if item := self.overlay.get(key):
+            return item[1]
+        return self.MISSING
+
+    async def _write(
+        self,
+        sql: str,
+        parameters: tuple,
+        key: str = None,
+        row: tuple | None = None,
+    ) -> None:
+        self.sequence += 1
+        self.pending.append((self.sequence, sql, parameters))
+        if key is not None:
+            self.overlay[key] = (self.sequence, row)
+        if len(self.pending) >= self.BATCH_SIZE:
+            await self.flush()
+
+    async def flush(self, final: bool = False) -> None:
+        async with self.flush_lock:
+            if not self.pending:
+                return
+            batch = self.pending[:]
+            # 提交成功前不移出队列，被取消或失败时由下一次提交重新写入
+            with self.metrics.timer("database"):
+                try:
+                    await self.__execute_batch(batch)
+                except Exception as error:
+                    await self.__rollback()
+                    self.flush_failures += 1
+                    logging(
+                        self.print,
+                        _("写入数据库 {0} 失败：{1}").format(self.name, repr(error)),
+                        ERROR,
+                    )
+                    if not final and self.flush_failures < self.FLUSH_RETRIES:
+                        return
+                    await self.__execute_rows(batch)
+            self.flush_failures = 0
+            del self.pending[: len(batch)]
+            self.__release_overlay(batch[-1][0])
+
+    async def __execute_batch(self, batch: list[tuple[int, str, tuple]]) -> None:
+        sql, parameters = batch[0][1], []
+        for __, statement, values in batch:
+            if statement != sql:
+                await self.database.executemany(sql, parameters)
+                sql, parameters = statement, []
+            parameters.append(values)
+        await self.database.executemany(sql, parameters)
+        await self.database.commit()
+
+    async def __execute_rows(self, batch: list[tuple[int, str, tuple]]) -> None:
+        """逐条写入，跳过无法写入的记录，避免单条记录阻塞后续所有写入"""
+        dropped = 0
+        for __, statement, values in batch:
+            try:
+                await self.database.execute(statement, values)
+            except Exception:
+                dropped += 1
+        try:
+            await self.database.commit()
+        except Exception:
+            await self.__rollback()
+            dropped = len(batch)
+        if dropped:
+            logging(
+                self.print,
+                _("数据库 {0} 丢弃了 {1} 条无法写入的记录").format(self.name, dropped),
+                WARNING,
+            )
+
+    async def __rollback(self) -> None:
+        with suppress(Exception):
+            await self.database.rollback()
+
+    def __release_overlay(self, sequence: int) -> None:
+        self.overlay = {k: v for k, v in self.overlay.items() if v[0] > sequence}
+
+    async def __flush_periodically(self) -> None:
+        while True:
+            await sleep(self.FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as error:
+                logging(
+                    self.print,
+                    _("写入数据库 {0} 失败：{1}").format(self.name, repr(error)),
+                    ERROR,
+                )
+
+    async def __stop_flush_task(self) -> None:
+        if self.flush_task:
+            self.flush_task.cancel()
+            with suppress(CancelledError):
+                await self.flush_task
+            self.flush_task = None
+
+    async def close(self) -> None:
+        await self.__stop_flush_task()
+        try:
+            await self.flush(final=True)
+        except Exception as error:
+            logging(
+                self.print,
+                _("写入数据库 {0} 失败：{1}").format(self.name, repr(error)),
+                ERROR,
+            )
+        finally:
+            with suppress(CancelledError, Exception):
+                await self.cursor.close()
+            await self.database.close()
+
     async def __aenter__(self):
         self.compatible()
         await self._connect_database()
+        await self._tune_database()
+        if self.switch:
+            await self._load_index()
+            self.flush_task = create_task(self.__flush_periodically())
         return self
 
     async def __aexit__(self, exc_type, exc_value, traceback):
-        with suppress(CancelledError):
-            await self.cursor.close()
-        await self.database.close()
+        await self.close()
 
     def compatible(
         self,
@@ -115,12 +315,15 @@ class DataRecorder(IDRecorder):
         );""")
         await self.database.commit()
 
+    async def _load_index(self):
+        pass
+
     async def select(self, id_: str):
         pass
 
     async def add(self, **kwargs) -> None:
         if self.switch:
-            await self.database.execute(
+            await self._write(
                 f"""REPLACE INTO explore_data (
         {", ".join(i[0] for i in self.DATA_TABLE)}
         ) VALUES (
@@ -128,7 +331,6 @@ class DataRecorder(IDRecorder):
         );""",
                 self.__generate_values(kwargs),
             )
-            await self.database.commit()
 
     async def __delete(self, id_: str) -> None:
         pass
@@ -161,23 +363,28 @@ class MapRecorder(IDRecorder):
         )
         await self.database.commit()
 
+    async def _load_index(self):
+        pass
+
     async def select(self, id_: str):
         if self.switch:
-            await self.cursor.execute(
+            if (row := self._read_overlay(id_)) is not self.MISSING:
+                return row
+            return await self._fetchone(
                 "SELECT NAME FROM mapping_data WHERE ID=?", (id_,)
             )
-            return await self.cursor.fetchone()
 
     async def add(self, id_: str, name: str, *args, **kwargs) -> None:
         if self.switch:
-            await self.database.execute(
+            await self._write(
                 "REPLACE INTO mapping_data VALUES (?, ?);",
                 (
                     id_,
                     name,
                 ),
+                id_,
+                (name,),
             )
-            await self.database.commit()
 
     async def __delete(self, id_: str) -> None:
         pass
@@ -187,5 +394,242 @@ class MapRecorder(IDRecorder):
 
     async def all(self):
         if self.switch:
+            await self.flush()
             await self.cursor.execute("SELECT ID, NAME FROM mapping_data")
             return [i[0] for i in await self.cursor.fetchmany()]
+
+
+class HashRecorder(IDRecorder):
+    """文件内容摘要索引，记录每个摘要对应的首个文件路径"""
+
+    def __init__(self, manager: "Manager"):
+        super().__init__(manager)
+        self.name = "FileHash.db"
+        self.file = manager.root.joinpath(self.name)
+        self.changed = True
+        self.switch = manager.file_dedup
+
+    async def _connect_database(self):
+        self.database = await connect(self.file)
+        self.cursor = await self.database.cursor()
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS file_hash ("
+            "HASH TEXT PRIMARY KEY,"
+            "PATH TEXT NOT NULL"
+            ");"
+        )
+        await self.database.commit()
+
+    async def _load_index(self):
+        pass
+
+    async def select(self, hash_: str):
+        if self.switch:
+            if (row := self._read_overlay(hash_)) is not self.MISSING:
+                return row
+            return await self._fetchone(
+                "SELECT PATH FROM file_hash WHERE HASH=?", (hash_,)
+            )
+
+    async def add(self, hash_: str, path: str, *args, **kwargs) -> None:
+        if self.switch:
+            await self._write(
+                "REPLACE INTO file_hash VALUES (?, ?);",
+                (
+                    hash_,
+                    path,
+                ),
+                hash_,
+                (path,),
+            )
+
+    async def __delete(self, hash_: str) -> None:
+        pass
+
+    async def delete(self, hashes: list[str]):
+        pass
+
+    async def all(self):
+        pass
+
+
+class LinkRecorder(IDRecorder):
+    """短链接解析结果，短链接指向的作品链接不会变化"""
+
+    def __init__(self, manager: "Manager"):
+        super().__init__(manager)
+        self.name = "LinkData.db"
+        self.file = manager.root.joinpath(self.name)
+        self.changed = True
+        self.switch = True
+
+    async def _connect_database(self):
+        self.database = await connect(self.file)
+        self.cursor = await self.database.cursor()
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS short_link ("
+            "LINK TEXT PRIMARY KEY,"
+            "URL TEXT NOT NULL"
+            ");"
+        )
+        await self.database.commit()
+
+    async def _load_index(self):
+        pass
+
+    async def select(self, link: str):
+        if (row := self._read_overlay(link)) is not self.MISSING:
+            return row
+        return await self._fetchone("SELECT URL FROM short_link WHERE LINK=?", (link,))
+
+    async def add(self, link: str, url: str, *args, **kwargs) -> None:
+        await self._write(
+            "REPLACE INTO short_link VALUES (?, ?);",
+            (
+                link,
+                url,
+            ),
+            link,
+            (url,),
+        )
+
+    async def __delete(self, link: str) -> None:
+        pass
+
+    async def delete(self, links: list[str]):
+        pass
+
+    async def all(self):
+        pass
+
+
+class JobRecorder(IDRecorder):
+    """下载任务日志，记录作品与文件的下载状态，程序异常退出后可以继续下载未完成的作品"""
+
+    PLANNED = "planned"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    # 超过该时间的任务记录视为过期，单位：秒
+    EXPIRY = 7 * 24 * 3600
+
+    def __init__(self, manager: "Manager"):
+        super().__init__(manager)
+        self.name = "DownloadJob.db"
+        self.file = manager.root.joinpath(self.name)
+        self.changed = True
+        self.switch = manager.download_journal
+
+    async def _connect_database(self):
+        self.database = await connect(self.file)
+        self.cursor = await self.database.cursor()
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS download_job ("
+            "ID TEXT PRIMARY KEY,"
+            "URL TEXT NOT NULL,"
+            "STATE TEXT NOT NULL,"
+            "UPDATED REAL NOT NULL"
+            ");"
+        )
+        await self.database.execute(
+            "CREATE TABLE IF NOT EXISTS download_file ("
+            "TEMP TEXT PRIMARY KEY,"
+            "URL TEXT NOT NULL,"
+            "STATE TEXT NOT NULL,"
+            "UPDATED REAL NOT NULL"
+            ");"
+        )
+        await self.database.commit()
+
+    async def _load_index(self):
+        await self.__prune()
+
+    async def _write(
+        self,
+        sql: str,
+        parameters: tuple,
+        key: str = None,
+        row: tuple | None = None,
+    ) -> None:
+        # 状态变化立即提交，程序异常退出时不会丢失最近的下载状态
+        await super()._write(sql, parameters, key, row)
+        await self.flush()
+
+    async def select(self, id_: str):
+        pass
+
+    async def add(self, id_: str, url: str, *args, **kwargs) -> None:
+        """记录计划下载的作品"""
+        if self.switch:
+            await self._write(
+                "INSERT INTO download_job VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(ID) DO UPDATE SET "
+                "URL=excluded.URL, STATE=excluded.STATE, UPDATED=excluded.UPDATED;",
+                (id_, url, self.PLANNED, time()),
+            )
+
+    async def update(self, id_: str, state: str) -> None:
+        """更新作品下载状态，不在计划中的作品不会记录"""
+        if self.switch:
+            await self._write(
+                "UPDATE download_job SET STATE=?, UPDATED=? WHERE ID=?;",
+                (state, time(), id_),
+            )
+
+    async def update_file(
+        self,
+        temp: str,
+        url: str,
+        state: str,
+    ) -> None:
+        """记录文件下载状态，已下载的数据量以缓存文件大小为准"""
+        if self.switch:
+            await self._write(
+                "REPLACE INTO download_file VALUES (?, ?, ?, ?);",
+                (temp, url, state, time()),
+            )
+
+    async def unfinished(self) -> list[str]:
+        """按计划顺序返回未完成作品的链接"""
+        if not self.switch:
+            return []
+        await self.flush()
+        return [
+            i[0]
+            for i in await self.database.execute_fetchall(
+                "SELECT URL FROM download_job WHERE STATE!=? ORDER BY rowid",
+                (self.DONE,),
+            )
+        ]
+
+    async def active_files(self) -> set[str]:
+        """返回未完成下载的缓存文件名称"""
+        if not self.switch:
+            return set()
+        await self.flush()
+        return {
+            i[0]
+            for i in await self.database.execute_fetchall(
+                "SELECT TEMP FROM download_file WHERE STATE!=?",
+                (self.DONE,),
+            )
+        }
+
+    async def __prune(self) -> None:
+        # 删除已完成与过期的记录，保持日志体积稳定
+        expired = time() - self.EXPIRY
+        for table in ("download_job", "download_file"):
+            await self.database.execute(
+                f"DELETE FROM {table} WHERE STATE=? OR UPDATED<?",
+                (self.DONE, expired),
+            )
+        await self.database.commit()
+
+    async def __delete(self, id_: str) -> None:
+        pass
+
+    async def delete(self, ids: list[str]):
+        pass
+
+    async def all(self):
+        pass
@@ -0,0 +1,209 @@
+from asyncio import Condition, Lock, sleep
+from collections import Counter
+from time import monotonic
+from urllib.parse import urlparse
+
+from .static import MAX_WORKERS
+
+__all__ = ["DownloadScheduler", "RateLimiter"]
+
+
+class HostLimiter:
+    """单个下载服务器的并发限制，按吞吐量加性增加，出现拥塞错误时乘性减少"""
+
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        self.minimum = minimum
+        self.maximum = max(maximum, minimum)
+        self.limit = min(max(initial, minimum), self.maximum)
+        self.active = 0
+        self.condition = Condition()
+        self.rate = 0.0
+        self.round_bytes = 0
+        self.round_count = 0
+        self.round_start = monotonic()
+
+    async def acquire(self) -> None:
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def release(self) -> None:
+        async with self.condition:
+            self.active -= 1
+            self.condition.notify_all()
+
+    def success(self, size: int) -> None:
+        self.round_bytes += size
+        self.round_count += 1
+        if self.round_count < self.limit:
+            return
+        now = monotonic()
+        rate = self.round_bytes / max(now - self.round_start, 1e-6)
+        if rate >= self.rate * 0.9:
+            # 提高并发后吞吐量未下降，继续尝试提高
+            self.limit = min(self.limit + 1, self.maximum)
+        elif rate < self.rate * 0.75:
+            # 吞吐量明显下降，说明带宽已饱和
+            self.limit = max(self.limit - 1, self.minimum)
+        self.rate = rate
+        self.__reset_round(now)
+
+    def failure(self) -> None:
+        self.limit = max(self.limit // 2, self.minimum)
+        self.rate = 0.0
+        self.__reset_round(monotonic())
+
+    def __reset_round(self, now: float) -> None:
+        self.round_bytes = 0
+        self.round_count = 0
+        self.round_start = now
+
+
+class BandwidthLimiter:
+    """全局下载速度限制，按字节数计算的令牌桶"""
+
+    def __init__(self, rate: int):
+        self.rate = rate
+        self.tokens = float(rate)
+        self.updated = monotonic()
+        self.lock = Lock()
+
+    async def consume(self, size: int) -> None:
+        if self.rate <= 0:
+            return
+        async with self.lock:
+            now = monotonic()
+            self.tokens = min(
+                self.tokens + (now - self.updated) * self.rate,
+                float(self.rate),
+            )
+            self.updated = now
+            self.tokens -= size
+            if self.tokens < 0:
+                await sleep(-self.tokens / self.rate)
+
+
+class DownloadSlot:
+    def __init__(self, limiter: HostLimiter):
+        self.limiter = limiter
+        self.size = 0
+        self.congested = False
+        self.completed = False
+
+    def record(self, size: int) -> None:
+        self.size += size
+
+    def success(self) -> None:
+        self.completed = True
+
+    def failure(self, congested: bool = True) -> None:
+        self.congested = congested
+
+    async def __aenter__(self):
+        await self.limiter.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.limiter.release()
+        if self.congested:
+            self.limiter.failure()
+        elif self.completed:
+            self.limiter.success(self.size)
+
+
+class DownloadScheduler:
+    def __init__(
+        self,
+        max_workers: int,
+        max_bandwidth: int = 0,
+        initial: int = MAX_WORKERS,
+    ):
+        self.max_workers = max_workers
+        self.initial = initial
+        self.hosts: dict[str, HostLimiter] = {}
+        self.bandwidth = BandwidthLimiter(max_bandwidth)
+
+    def slot(self, url: str) -> DownloadSlot:
+        host = urlparse(url).netloc
+        if not (limiter := self.hosts.get(host)):
+            limiter = self.hosts[host] = HostLimiter(
+                self.initial,
+                self.max_workers,
+            )
+        return DownloadSlot(limiter)
+
+    async def throttle(self, size: int) -> None:
+        await self.bandwidth.consume(size)
+
+    def statistics(self) -> dict[str, int]:
+        return {host: limiter.limit for host, limiter in self.hosts.items()}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = monotonic()
+        self.blocked = 0.0
+        self.backoff = 0.0
+        self.lock = Lock()
+
+    def refill(self) -> None:
+        now = monotonic()
+        self.tokens = min(self.tokens + (now - self.updated) * self.rate, self.burst)
+        self.updated = now
+
+
+class RateLimiter:
+    """按服务器限制请求频率的令牌桶，服务器返回 429 或 403 时暂停该服务器的请求并指数退避"""
+
+    BACKOFF = 2.0
+    BACKOFF_MAX = 120.0
+    THROTTLED = {429, 403}
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.hosts: dict[str, TokenBucket] = {}
+        self.statistics = Counter()
+
+    def __bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        if not (bucket := self.hosts.get(host)):
+            bucket = self.hosts[host] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    async def acquire(self, url: str, limited: bool = True) -> None:
+        """等待请求许可，limited 为 False 时仅等待退避时间，不消耗令牌"""
+        bucket = self.__bucket(url)
+        async with bucket.lock:
+            if (delay := bucket.blocked - monotonic()) > 0:
+                self.statistics["backoff"] += 1
+                await sleep(delay)
+            if not limited or self.rate <= 0:
+                return
+            bucket.refill()
+            if bucket.tokens < 1:
+                self.statistics["throttled"] += 1
+                await sleep((1 - bucket.tokens) / self.rate)
+                bucket.refill()
+            bucket.tokens -= 1
+            self.statistics["acquired"] += 1
+
+    def feedback(self, url: str, status: int, retry_after: str = None) -> None:
+        bucket = self.__bucket(url)
+        if status not in self.THROTTLED:
+            bucket.backoff = 0.0
+            return
+        self.statistics["penalized"] += 1
+        bucket.backoff = min(bucket.backoff * 2 or self.BACKOFF, self.BACKOFF_MAX)
+        delay = max(bucket.backoff, self.__parse_retry_after(retry_after))
+        bucket.blocked = max(bucket.blocked, monotonic() + delay)
+
+    @staticmethod
+    def __parse_retry_after(value: str | None) -> float:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return 0.0
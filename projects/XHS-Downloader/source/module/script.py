@@ -1,32 +1,96 @@
+from asyncio import Queue, Task, create_task, gather
 from contextlib import suppress
-from json import loads
+from itertools import count
+from json import dumps, loads
 from websockets import ConnectionClosed, serve
 from typing import TYPE_CHECKING
 
+from ..translation import _
+from .static import ERROR
+from .tools import logging
+
 if TYPE_CHECKING:
     from ..application import XHS
 
 
 class ScriptServer:
+    # 任务队列已满时暂停读取消息，由 WebSocket 连接向用户脚本施加背压
+    QUEUE_SIZE = 64
+
     def __init__(
         self,
         core: "XHS",
         host="0.0.0.0",
         port=5558,
+        workers=3,
     ):
         self.core = core
         self.host = host
         self.port = port
         self.server = None
+        self.workers = workers
+        self.queue: Queue[tuple] = Queue(self.QUEUE_SIZE)
+        self.tasks: list[Task] = []
+        self.number = count(1)
 
     async def handler(self, websocket):
         with suppress(ConnectionClosed):
             async for message in websocket:
-                data = loads(message)
-                await self.core.deal_script_tasks(**data)
+                try:
+                    data = loads(message)
+                except ValueError as error:
+                    await self.send(
+                        websocket,
+                        type="error",
+                        message=repr(error),
+                    )
+                    continue
+                if not isinstance(data, dict):
+                    await self.send(
+                        websocket,
+                        type="error",
+                        message=_("消息格式错误，需要 JSON 对象"),
+                    )
+                    continue
+                id_ = data.pop("id", None) or next(self.number)
+                await self.queue.put((websocket, id_, data))
+                await self.send(
+                    websocket,
+                    type="ack",
+                    id=id_,
+                    queue=self.queue.qsize(),
+                )
+
+    async def worker(self):
+        while True:
+            websocket, id_, data = await self.queue.get()
+            try:
+                result = await self.core.deal_script_tasks(**data)
+            except Exception as error:
+                logging(
+                    self.core.print,
+                    _("处理用户脚本任务时发生异常：{0}").format(repr(error)),
+                    ERROR,
+                )
+                result = None
+            finally:
+                self.queue.task_done()
+            await self.send(
+                websocket,
+                type="done",
+                id=id_,
+                success=bool(result),
+                queue=self.queue.qsize(),
+            )
+
+    @staticmethod
+    async def send(websocket, **kwargs) -> None:
+        with suppress(ConnectionClosed):
+            await websocket.send(dumps(kwargs, ensure_ascii=False))
 
     async def start(self):
         """启动服务器"""
+        self.tasks = [create_task(self.worker()) for __ in range(self.workers)]
         self.server = await serve(
             self.handler,
             self.host,
@@ -38,6 +102,10 @@ class ScriptServer:
         if self.server:
             self.server.close()
             await self.server.wait_closed()
+        for task in self.tasks:
+            task.cancel()
+        await gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
 
     async def __aenter__(self):
         await self.start()
@@ -0,0 +1,87 @@
+from collections import Counter
+
+from httpx import AsyncClient
+
+from .scheduler import RateLimiter
+
+__all__ = ["SessionPool"]
+
+
+class Session:
+    def __init__(
+        self,
+        number: int,
+        client: AsyncClient,
+        limiter: RateLimiter,
+    ):
+        self.number = number
+        self.client = client
+        self.limiter = limiter
+        self.failures = 0
+        self.retired = False
+        self.statistics = Counter()
+
+
+class SessionPool:
+    """多个 Cookie 会话组成的请求池，每个会话拥有独立的客户端与请求频率限制"""
+
+    # 连续获取数据失败达到该次数后停止使用该会话
+    RETIRE_AFTER = 3
+
+    def __init__(
+        self,
+        cookies: list[str],
+        headers: dict,
+        timeout: int,
+        proxy: str = None,
+        rate: float = 0,
+        burst: int = 1,
+        http2: bool = False,
+    ):
+        self.sessions = [
+            Session(
+                i,
+                AsyncClient(
+                    headers=headers | {"cookie": cookie},
+                    timeout=timeout,
+                    verify=False,
+                    follow_redirects=True,
+                    proxy=proxy,
+                    http2=http2,
+                ),
+                RateLimiter(rate, burst),
+            )
+            for i, cookie in enumerate(cookies, start=1)
+        ]
+        self.index = -1
+
+    def __bool__(self):
+        return any(not i.retired for i in self.sessions)
+
+    def select(self) -> Session | None:
+        """轮流选择可用会话，全部会话停止使用时返回 None"""
+        if not (active := [i for i in self.sessions if not i.retired]):
+            return None
+        self.index = (self.index + 1) % len(active)
+        return active[self.index]
+
+    def feedback(self, session: Session, success: bool | None) -> bool:
+        """记录会话获取数据的结果，返回 True 表示该会话本次被停止使用"""
+        if success is None:
+            # 请求未得到响应数据，网络异常与会话是否有效无关，仅记录次数
+            session.statistics["error"] += 1
+            return False
+        if success:
+            session.failures = 0
+            session.statistics["success"] += 1
+            return False
+        session.failures += 1
+        session.statistics["failure"] += 1
+        if session.retired or session.failures < self.RETIRE_AFTER:
+            return False
+        session.retired = True
+        return True
+
+    async def close(self) -> None:
+        for session in self.sessions:
+            await session.client.aclose()
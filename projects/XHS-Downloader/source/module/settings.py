@@ -16,7 +16,7 @@ class Settings:
         "name_format": "发布时间 作者昵称 作品标题",  # 文件命名格式
         "user_agent": USERAGENT,  # 请求头
         "cookie": "",  # Cookie
-        "proxy": None,  # 代理设置
+        "proxy": None,  # 代理设置，设置为列表时启用代理池
         "timeout": 10,  # 超时时间(秒)
         "chunk": 1024 * 1024 * 2,  # 下载块大小(字节)
         "max_retry": 5,  # 最大重试次数
@@ -31,6 +31,21 @@ class Settings:
         "write_mtime": False,  # 是否写入修改时间
         "language": "zh_CN",  # 语言设置
         "script_server": False,  # 是否启用脚本服务器
+        "note_concurrency": 3,  # 作品并发处理数量
+        "max_workers": 8,  # 单个下载服务器最大并发下载数量
+        "max_bandwidth": 0,  # 下载速度限制(字节/秒)，0 表示不限制
+        "video_segments": 4,  # 视频文件分段下载连接数量，1 表示不分段
+        "file_dedup": False,  # 是否对内容相同的文件去重，使用硬链接保存
+        "cache_ttl": 300,  # 作品数据缓存有效时间(秒)，0 表示不缓存
+        "cache_size": 1024,  # 作品数据缓存最大数量
+        "cache_persist": False,  # 是否将作品数据缓存保存至文件
+        "request_rate": 0.5,  # 每个服务器每秒最多请求次数，0 表示不限制
+        "request_burst": 2,  # 每个服务器允许连续请求的次数
+        "cookie_pool": [],  # Cookie 池，每个 Cookie 使用独立的客户端与请求频率限制
+        "http2": False,  # 是否启用 HTTP/2，需要安装 h2 模块
+        "monitor_workers": 3,  # 监听剪贴板模式同时处理的链接数量
+        "script_workers": 3,  # 脚本服务器同时处理的任务数量
+        "download_journal": True,  # 是否记录下载任务日志，程序异常退出后可以继续下载未完成的作品
     }
     # 根据操作系统设置编码格式
     encode = "UTF-8-SIG" if system() == "Windows" else "UTF-8"
@@ -1,22 +1,94 @@
 from asyncio import sleep
+from collections import Counter
+from contextvars import ContextVar
 from random import uniform
 from typing import Callable
 
+from httpx import HTTPStatusError, TimeoutException, TransportError
 from rich import print
 from rich.text import Text
 
+from ..expansion import CacheError
 from ..translation import _
 from .static import INFO
 
+# 被装饰函数最近一次失败的原因，由 RetryPolicy.record 写入
+LAST_ERROR: ContextVar[Exception | None] = ContextVar("LAST_ERROR", default=None)
+
+
+class RetryPolicy:
+    """按错误类型决定是否重试，重试前指数退避并加入随机抖动，全局重试预算随成功请求恢复"""
+
+    # 各类错误允许的重试次数，未列出的类型使用 max_retry
+    LIMITS = {
+        "not_found": 0,
+        "client": 0,
+        "range": 1,
+    }
+    BASE = 0.5
+    MAXIMUM = 30.0
+    # 全局重试预算：每次重试消耗 1，每次成功恢复 BUDGET_RATIO，最多 BUDGET
+    BUDGET = 20.0
+    BUDGET_RATIO = 0.2
+
+    def __init__(self, retry: int):
+        self.retry = retry
+        self.budget = self.BUDGET
+        self.statistics = Counter()
+
+    @staticmethod
+    def record(error: Exception) -> None:
+        LAST_ERROR.set(error)
+
+    @staticmethod
+    def classify(error: Exception | None) -> str:
+        if isinstance(error, HTTPStatusError):
+            status = error.response.status_code
+            if status in {404, 410}:
+                return "not_found"
+            if status == 416:
+                return "range"
+            if status in {403, 429}:
+                return "throttled"
+            return "server" if status >= 500 else "client"
+        if isinstance(error, TimeoutException):
+            return "timeout"
+        if isinstance(error, TransportError):
+            return "network"
+        if error is None:
+            return "empty"
+        return "range" if isinstance(error, CacheError) else "other"
+
+    def success(self) -> None:
+        self.budget = min(self.budget + self.BUDGET_RATIO, self.BUDGET)
+
+    def schedule(self, error: Exception | None, attempt: int) -> float | None:
+        """返回下一次重试前的等待时间，返回 None 表示放弃重试"""
+        type_ = self.classify(error)
+        if attempt >= self.LIMITS.get(type_, self.retry):
+            self.statistics[f"give_up:{type_}"] += 1
+            return None
+        if self.budget < 1:
+            self.statistics["budget_exhausted"] += 1
+            return None
+        self.budget -= 1
+        self.statistics[f"retry:{type_}"] += 1
+        return min(self.BASE * 2**attempt, self.MAXIMUM) * uniform(0.5, 1)
+
 
 def retry(function):
     async def inner(self, *args, **kwargs):
-        if result := await function(self, *args, **kwargs):
-            return result
-        for __ in range(self.retry):
+        policy: RetryPolicy = self.retry_policy
+        attempt = 0
+        while True:
+            LAST_ERROR.set(None)
             if result := await function(self, *args, **kwargs):
+                policy.success()
+                return result
+            if (delay := policy.schedule(LAST_ERROR.get(), attempt)) is None:
                 return result
-        return result
+            await sleep(delay)
+            attempt += 1
 
     return inner
 
@@ -2180,7 +2180,21 @@ KS-Downloader（快手、KuaiShou）：https://github.com/JoeanAmier/KS-Download
         }
 
         onMessage(message) {
-
+            let data;
+            try {
+                data = JSON.parse(message.data);
+            } catch (error) {
+                console.error('Script Server message error:', error);
+                return;
+            }
+            if (data.type === "done") {
+                console.debug(`任务 ${data.id} 处理完成，剩余任务 ${data.queue} 个`);
+                if (!data.success) {
+                    showToast("脚本服务器处理作品失败，请检查程序运行日志！");
+                }
+            } else if (data.type === "error") {
+                console.error('Script Server task error:', data.message);
+            }
         }
 
         onClose(event) {
@@ -45,27 +45,62 @@ class DownloadRecordChecker:
     
     def __init__(self, db_path: Path = XHS_EXPLORE_ID_DB):
         self.db_path = db_path
+        self._ids: Optional[Set[str]] = None
+        self._signature: Optional[tuple] = None
+        self.hits = 0
+        self.misses = 0
+    
+    def _get_signature(self) -> tuple:
+        """数据库及 WAL 文件的修改时间和大小，用于判断记录是否被外部修改"""
+        signature = []
+        for path in (self.db_path, self.db_path.with_name(f"{self.db_path.name}-wal")):
+            try:
+                stat = path.stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
     
     def get_downloaded_ids(self) -> Set[str]:
         """
         获取所有已下载的作品ID
         
+        仅在首次调用或数据库文件发生变化时读取数据库，其余情况直接返回内存索引
+        
         Returns:
             已下载ID集合
         """
         if not self.db_path.exists():
             return set()
         
+        signature = self._get_signature()
+        if self._ids is not None and signature == self._signature:
+            return self._ids
+        
         try:
             conn = sqlite3.connect(self.db_path)
             cursor = conn.execute("SELECT id FROM explore_id")
             ids = {row[0] for row in cursor.fetchall()}
             conn.close()
+            self._ids, self._signature = ids, signature
             return ids
         except Exception as e:
             print(f"读取下载记录失败: {e}")
             return set()
     
+    def statistics(self) -> Dict[str, int]:
+        """
+        获取下载记录查询的命中统计
+        
+        Returns:
+            命中、未命中次数及索引大小
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._ids or ()),
+        }
+    
     def is_downloaded(self, note_id: str) -> bool:
         """
         检查作品是否已下载
@@ -76,7 +111,12 @@ class DownloadRecordChecker:
         Returns:
             是否已下载
         """
-        return note_id in self.get_downloaded_ids()
+        downloaded = note_id in self.get_downloaded_ids()
+        if downloaded:
+            self.hits += 1
+        else:
+            self.misses += 1
+        return downloaded
     
     def filter_not_downloaded(self, notes: List[NoteInfo]) -> List[NoteInfo]:
         """
@@ -88,8 +128,7 @@ class DownloadRecordChecker:
         Returns:
             未下载的笔记列表
         """
-        downloaded = self.get_downloaded_ids()
-        return [note for note in notes if note.note_id not in downloaded]
+        return [note for note in notes if not self.is_downloaded(note.note_id)]
 
 
 class Downloader: